@@ -0,0 +1,14 @@
+''' Models used by benchmarks/run.py. '''
+from django.conf import settings
+from django.db import models
+
+from generic_images.fields import ImageCountField
+
+
+class Album(models.Model):
+    ''' Object images are attached to; keeps denormalised image count. '''
+    title = models.CharField(max_length=100)
+    image_count = ImageCountField(incremental=settings.BENCH_INCREMENTAL_COUNT)
+
+    def __unicode__(self):
+        return self.title
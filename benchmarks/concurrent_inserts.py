@@ -0,0 +1,87 @@
+'''
+Insert throughput of AttachedImage with N concurrent writers for different
+order allocators and file namers.
+
+Usage::
+
+    python benchmarks/concurrent_inserts.py [writers] [images_per_writer]
+
+Each writer attaches images to its own user and to one shared user so both
+contended and uncontended objects are measured. Files with the same name are
+reported as clashes (the file of one of the writers would be overwritten by a
+storage that doesn't rename files). Benchmark fails if any writer fails.
+'''
+import threading
+import time
+import traceback
+import sys
+
+from utils import setup_database, image_file
+
+
+def run(allocator, namer, writers, per_writer):
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from generic_images.models import AttachedImage
+
+    shared = User.objects.create(username='shared-%s' % time.time())
+    owners = [User.objects.create(username='writer-%d-%s' % (i, time.time()))
+              for i in range(writers)]
+    errors = []
+
+    def writer(owner):
+        try:
+            for i in range(per_writer):
+                target = shared if i % 2 else owner
+                image = AttachedImage(content_object=target, user=owner)
+                image.order_allocator = allocator
+                image.file_namer = namer
+                image.image.save('bench.gif', image_file(), save=False)
+                image.save()
+        except Exception:
+            errors.append(traceback.format_exc())
+        connection.close()
+
+    threads = [threading.Thread(target=writer, args=(owner,)) for owner in owners]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+    if errors:
+        raise RuntimeError("%d of %d writers failed:\n%s" % (len(errors),
+                           writers, "\n".join(errors)))
+
+    images = AttachedImage.objects.filter(user__in=owners)
+    names = images.values_list('image', flat=True)
+    orders = images.filter(object_id=shared.pk).values_list('order', flat=True)
+    return {
+        'images_per_second': writers * per_writer / elapsed,
+        'file_name_clashes': len(names) - len(set(names)),
+        'order_clashes': len(orders) - len(set(orders)),
+    }
+
+
+def main():
+    from generic_images.allocators import (MaxOrderAllocator,
+                    SequenceAllocator, UUIDFileNamer, HashFileNamer)
+
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    per_writer = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    setup_database()
+
+    variants = [
+        ('max-order+uuid', MaxOrderAllocator(), UUIDFileNamer()),
+        ('sequence+uuid', SequenceAllocator(), UUIDFileNamer()),
+        ('max-order+hash', MaxOrderAllocator(), HashFileNamer()),
+    ]
+    for name, allocator, namer in variants:
+        result = run(allocator, namer, writers, per_writer)
+        print("%-16s writers=%d %8.1f img/s  name clashes=%d  "
+              "order clashes=%d" % (name, writers,
+              result['images_per_second'], result['file_name_clashes'],
+              result['order_clashes']))
+
+if __name__ == '__main__':
+    main()
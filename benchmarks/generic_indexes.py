@@ -0,0 +1,131 @@
+'''
+Query plans and latency of the hot generic relation lookups with and
+without composite indexes (``AttachedImage.composite_indexes``).
+
+Usage::
+
+    python benchmarks/generic_indexes.py [rows] [objects] [repeat]
+
+``rows`` attached images (1000000 by default) are spread over ``objects``
+objects (rows/10 by default). Indexes are dropped, queries are timed and
+explained, then indexes are created again and measured once more.
+Use ``BENCH_DATABASE_*`` environment variables to run it on PostgreSQL or
+MySQL.
+'''
+import random
+import sys
+import time
+
+from utils import setup_database
+
+
+def fill(rows, objects, batch_size=10000):
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from generic_images.models import AttachedImage
+    from generic_utils.db import bulk_insert
+    from generic_utils.contenttypes import resolver
+
+    content_type = resolver.get_for_model(User)
+    AttachedImage.objects.all().delete()
+    for start in range(0, rows, batch_size):
+        images = [AttachedImage(content_type=content_type,
+                                object_id=i % objects + 1,
+                                order=i // objects + 1,
+                                is_main=(i < objects),
+                                image='bench/%d.gif' % i)
+                  for i in range(start, min(start + batch_size, rows))]
+        bulk_insert(AttachedImage, images, batch_size)
+        transaction.commit_unless_managed()
+    return content_type
+
+
+def queries(content_type, object_id):
+    ''' (name, queryset) pairs for the measured lookups. '''
+    from generic_images.models import AttachedImage
+    images = AttachedImage.objects.filter(content_type=content_type.pk,
+                                          object_id=object_id)
+    ids = [object_id + i for i in range(20)]
+    return [
+        ('for_model ordered', images.order_by('-order')[:20]),
+        ('get_main_for', images.filter(is_main=True)),
+        ('next', images.filter(order__lt=5).order_by('-order')[:1]),
+        ('injector object_id__in', AttachedImage.objects.filter(
+                        content_type=content_type.pk, object_id__in=ids)),
+    ]
+
+
+def explain(queryset):
+    from django.conf import settings
+    from django.db import connection
+    prefix = {'sqlite3': 'EXPLAIN QUERY PLAN',
+              'postgresql': 'EXPLAIN ANALYZE',
+              'postgresql_psycopg2': 'EXPLAIN ANALYZE'}.get(
+                                    settings.DATABASE_ENGINE, 'EXPLAIN')
+    sql, params = queryset.query.as_sql()
+    cursor = connection.cursor()
+    cursor.execute("%s %s" % (prefix, sql), params)
+    return "\n".join(["    " + " ".join([str(col) for col in row])
+                      for row in cursor.fetchall()])
+
+
+def measure(content_type, objects, repeat):
+    results = {}
+    for i in range(repeat):
+        object_id = random.randint(1, max(objects - 20, 1))
+        for name, queryset in queries(content_type, object_id):
+            start = time.time()
+            list(queryset)
+            results.setdefault(name, []).append(time.time() - start)
+    return results
+
+
+def set_indexes(create):
+    from django.conf import settings
+    from django.db import connection, transaction
+    from generic_images.models import AttachedImage
+    from generic_utils.db import composite_index_sql
+
+    qn = connection.ops.quote_name
+    table = qn(AttachedImage._meta.db_table)
+    cursor = connection.cursor()
+    for sql in composite_index_sql(AttachedImage):
+        name = sql.split()[2]
+        try:
+            if create:
+                cursor.execute(sql)
+            elif settings.DATABASE_ENGINE == 'mysql':
+                cursor.execute("DROP INDEX %s ON %s" % (name, table))
+            else:
+                cursor.execute("DROP INDEX %s" % name)
+        except Exception: # already created or dropped
+            transaction.rollback_unless_managed()
+    if settings.DATABASE_ENGINE != 'mysql':
+        cursor.execute("ANALYZE")
+    transaction.commit_unless_managed()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    objects = int(sys.argv[2]) if len(sys.argv) > 2 else rows // 10
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    setup_database()
+
+    start = time.time()
+    content_type = fill(rows, objects)
+    print("%d rows inserted in %.1fs" % (rows, time.time() - start))
+
+    for label, create in (('without composite indexes', False),
+                          ('with composite indexes', True)):
+        set_indexes(create)
+        print("\n== %s ==" % label)
+        results = measure(content_type, objects, repeat)
+        for name, queryset in queries(content_type, objects // 2):
+            timings = sorted(results[name])
+            print("%-24s median %8.3fms  p95 %8.3fms" % (name,
+                  timings[len(timings) // 2] * 1000,
+                  timings[int(len(timings) * 0.95)] * 1000))
+            print(explain(queryset))
+
+if __name__ == '__main__':
+    main()
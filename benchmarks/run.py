@@ -0,0 +1,320 @@
+'''
+Benchmark suite for the main generic_images code paths. Results are written
+as JSON so runs of different releases can be compared.
+
+Usage::
+
+    python benchmarks/run.py [options] > results.json
+    python benchmarks/run.py --compare=old-results.json > new-results.json
+
+Synthetic data is generated for each size given by ``--sizes`` (number of
+attached images, 1000 to 1000000 by default; data is only added between
+sizes). Images are attached to ``bench.Album`` objects
+(``--per-album`` images each), albums keep image count in
+``ImageCountField``. For every size these operations are measured:
+
+* ``AttachedImage.save`` -- attaching a new image (file is stored too);
+* ``ImageCountField.update`` -- count field update triggered by the save;
+* ``GenericInjector.inject_to`` -- main images of ``--inject-batch``
+  albums;
+* ``AttachedImage.next`` and ``AttachedImage.previous``;
+* ``AttachedImagesInline.render`` -- rendering of the admin inline for an
+  album.
+
+Each operation gets median, 95th percentile and mean time (ms), operations
+per second and average number of SQL queries and storage calls per call
+(counted by :mod:`generic_utils.instrumentation`).
+
+With ``--compare`` operations whose median time grew more than
+``--threshold`` (0.25 by default) or that execute more queries than in the
+given results file are reported to stderr and exit status is 1.
+
+SQLite database in a temporary directory is used by default. Use
+``BENCH_DATABASE_*`` environment variables to run benchmarks on PostgreSQL
+and ``BENCH_INCREMENTAL_COUNT=1`` to measure incremental image count field.
+'''
+import datetime
+import optparse
+import random
+import sys
+import time
+
+from utils import setup_database, image_file
+
+try:
+    import json
+except ImportError:
+    from django.utils import simplejson as json
+
+DEFAULT_SIZES = '1000,10000,100000,1000000'
+
+
+def fill(first, last, per_album, batch_size=10000):
+    ''' Adds albums with attached images so there are ``last`` images
+        instead of ``first``. '''
+    from django.db import transaction
+    from generic_images.models import AttachedImage
+    from generic_utils.contenttypes import resolver
+    from generic_utils.db import bulk_insert
+    from benchmarks.bench.models import Album
+
+    content_type = resolver.get_for_model(Album)
+    old_albums = first // per_album
+    new_albums = last // per_album - old_albums
+    bulk_insert(Album, [Album(title='album %d' % i, image_count=per_album)
+                        for i in range(old_albums, old_albums + new_albums)],
+                batch_size)
+    transaction.commit_unless_managed()
+
+    album_ids = Album.objects.order_by('pk').values_list('pk', flat=True)
+    album_ids = list(album_ids[old_albums:old_albums + new_albums])
+    albums_per_batch = max(batch_size // per_album, 1)
+    for start in range(0, len(album_ids), albums_per_batch):
+        images = []
+        for album_id in album_ids[start:start + albums_per_batch]:
+            for order in range(1, per_album + 1):
+                images.append(AttachedImage(content_type=content_type,
+                                            object_id=album_id, order=order,
+                                            is_main=(order == 1),
+                                            image='bench/%d-%d.gif' % (album_id, order)))
+        bulk_insert(AttachedImage, images, batch_size)
+        transaction.commit_unless_managed()
+
+
+def sample(fn, repeat):
+    ''' Calls ``fn(i)`` for i in range(repeat) and returns list of
+        :class:`~generic_utils.instrumentation.Measurement` instances.
+        ``fn`` returns callable that is measured (so preparation is not
+        measured). '''
+    from generic_utils.instrumentation import Measurement
+    measurements = []
+    for i in range(repeat):
+        call = fn(i)
+        measurement = Measurement(fn.__name__)
+        measurement.__enter__()
+        try:
+            call()
+        finally:
+            measurement.__exit__(None, None, None)
+        measurements.append(measurement)
+    return measurements
+
+
+def summarize(measurements):
+    timings = sorted([m.time for m in measurements])
+    calls = len(measurements)
+    total = sum(timings)
+    return {
+        'calls': calls,
+        'median_ms': timings[calls // 2] * 1000,
+        'p95_ms': timings[min(int(calls * 0.95), calls - 1)] * 1000,
+        'mean_ms': total / calls * 1000,
+        'ops_per_second': total and calls / total or None,
+        'queries_per_call': float(sum([m.queries for m in measurements])) / calls,
+        'storage_calls_per_call': float(sum([m.storage_calls
+                                             for m in measurements])) / calls,
+    }
+
+
+def summarize_totals(totals):
+    ''' Summary of operation aggregated by instrumentation registry. '''
+    calls = totals['calls']
+    return {
+        'calls': calls,
+        'mean_ms': totals['time'] / calls * 1000,
+        'ops_per_second': totals['time'] and calls / totals['time'] or None,
+        'queries_per_call': float(totals['queries']) / calls,
+        'storage_calls_per_call': float(totals['storage_calls']) / calls,
+    }
+
+
+def random_albums(count):
+    from benchmarks.bench.models import Album
+    total = Album.objects.count()
+    start = random.randint(0, max(total - count, 0))
+    return list(Album.objects.order_by('pk')[start:start + count])
+
+
+def random_image(albums, per_album):
+    from generic_images.models import AttachedImage
+    album = random.choice(albums)
+    return AttachedImage.objects.for_model(album).get(
+                                order=random.randint(1, per_album))
+
+
+def bench_save(albums, repeat):
+    from django.contrib.auth.models import User
+    from generic_images.models import AttachedImage
+    from generic_utils import instrumentation
+
+    user = User.objects.get(username='bench')
+
+    def save(i):
+        image = AttachedImage(content_object=random.choice(albums), user=user)
+        def call():
+            image.image.save('bench.gif', image_file(), save=False)
+            image.save()
+        return call
+
+    instrumentation.registry.reset()
+    results = {'AttachedImage.save': summarize(sample(save, repeat))}
+    totals = instrumentation.registry.operations.get('ImageCountField.update')
+    if totals:
+        results['ImageCountField.update'] = summarize_totals(totals)
+    return results
+
+
+def bench_inject(batch, repeat):
+    from generic_images.models import AttachedImage
+
+    def inject_to(i):
+        albums = random_albums(batch)
+        return lambda: AttachedImage.injector.inject_to(albums, 'main_image',
+                                                        is_main=True)
+    return {'GenericInjector.inject_to': summarize(sample(inject_to, repeat))}
+
+
+def bench_neighbours(albums, per_album, repeat):
+    def next_image(i):
+        return random_image(albums, per_album).next
+
+    def previous_image(i):
+        return random_image(albums, per_album).previous
+
+    return {'AttachedImage.next': summarize(sample(next_image, repeat)),
+            'AttachedImage.previous': summarize(sample(previous_image, repeat))}
+
+
+def bench_admin_inline(albums, repeat):
+    from django.contrib import admin
+    from django.contrib.admin import helpers
+    from django.contrib.auth.models import User
+    from django.http import HttpRequest
+    from django.template.loader import render_to_string
+    from generic_images.admin import AttachedImagesInline
+    from benchmarks.bench.models import Album
+
+    request = HttpRequest()
+    request.user = User.objects.get(username='bench')
+    inline = AttachedImagesInline(Album, admin.site)
+
+    def render(i):
+        album = random.choice(albums)
+        def call():
+            formset = inline.get_formset(request, album)(instance=album)
+            fieldsets = list(inline.get_fieldsets(request, album))
+            inline_formset = helpers.InlineAdminFormSet(inline, formset,
+                                                        fieldsets)
+            render_to_string(inline.template, {
+                'inline_admin_formset': inline_formset,
+                'original': album,
+                'opts': Album._meta,
+            })
+        return call
+    return {'AttachedImagesInline.render': summarize(sample(render, repeat))}
+
+
+def run_size(options):
+    albums = random_albums(100)
+    results = {}
+    results.update(bench_save(albums, options.repeat))
+    results.update(bench_inject(options.inject_batch, options.repeat))
+    results.update(bench_neighbours(albums, options.per_album, options.repeat))
+    results.update(bench_admin_inline(albums, max(options.repeat // 10, 1)))
+    return results
+
+
+def compare(old, new, threshold):
+    ''' Returns list of regression descriptions. '''
+    old_sizes = dict([(run['size'], run['operations']) for run in old['results']])
+    regressions = []
+    for run in new['results']:
+        for name, stats in sorted(run['operations'].items()):
+            old_stats = old_sizes.get(run['size'], {}).get(name)
+            if old_stats is None:
+                continue
+            if 'median_ms' in stats and \
+                    stats['median_ms'] > old_stats['median_ms'] * (1 + threshold):
+                regressions.append("%s (%d images): median %.3fms -> %.3fms" % (
+                        name, run['size'], old_stats['median_ms'], stats['median_ms']))
+            if stats['queries_per_call'] > old_stats['queries_per_call']:
+                regressions.append("%s (%d images): %.1f -> %.1f queries" % (
+                        name, run['size'], old_stats['queries_per_call'],
+                        stats['queries_per_call']))
+    return regressions
+
+
+def metadata(options):
+    import platform
+    import django
+    from django.conf import settings
+    return {
+        'date': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': settings.DATABASE_ENGINE,
+        'incremental_count': settings.BENCH_INCREMENTAL_COUNT,
+        'per_album': options.per_album,
+        'repeat': options.repeat,
+        'inject_batch': options.inject_batch,
+        'seed': options.seed,
+    }
+
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('--sizes', default=DEFAULT_SIZES,
+                      help='comma separated numbers of images [%default]')
+    parser.add_option('--per-album', type='int', default=10,
+                      help='images per album [%default]')
+    parser.add_option('--repeat', type='int', default=200,
+                      help='calls of each operation per size [%default]')
+    parser.add_option('--inject-batch', type='int', default=100,
+                      help='albums per inject_to call [%default]')
+    parser.add_option('--seed', type='int', default=0)
+    parser.add_option('--output', help='write results to file instead of stdout')
+    parser.add_option('--compare', help='results file to compare with')
+    parser.add_option('--threshold', type='float', default=0.25,
+                      help='allowed relative growth of median time [%default]')
+    options, args = parser.parse_args()
+    sizes = sorted([int(size) for size in options.sizes.split(',')])
+
+    random.seed(options.seed)
+    setup_database()
+
+    from django.contrib.auth.models import User
+    from generic_utils import instrumentation
+    User.objects.create(username='bench', is_staff=True, is_superuser=True)
+    instrumentation.add_hook(instrumentation.registry)
+
+    output = {'meta': metadata(options), 'results': []}
+    filled = 0
+    for size in sizes:
+        start = time.time()
+        fill(filled, size, options.per_album)
+        filled = size
+        sys.stderr.write("%d images: data generated in %.1fs\n" % (
+                         size, time.time() - start))
+        output['results'].append({'size': size,
+                                  'operations': run_size(options)})
+
+    data = json.dumps(output, indent=2, sort_keys=True)
+    if options.output:
+        out = open(options.output, 'w')
+        try:
+            out.write(data)
+        finally:
+            out.close()
+    else:
+        sys.stdout.write(data + '\n')
+
+    if options.compare:
+        regressions = compare(json.load(open(options.compare)), output,
+                              options.threshold)
+        for line in regressions:
+            sys.stderr.write("REGRESSION %s\n" % line)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
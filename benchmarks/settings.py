@@ -0,0 +1,37 @@
+# Django settings for running benchmarks against SQLite.
+# Use BENCH_DATABASE_* environment variables to run them against
+# another database (e.g. local PostgreSQL).
+import os
+import tempfile
+
+BENCH_ROOT = os.environ.get('BENCH_ROOT') or tempfile.mkdtemp(prefix='generic_images_bench')
+
+DATABASE_ENGINE = os.environ.get('BENCH_DATABASE_ENGINE', 'sqlite3')
+DATABASE_NAME = os.environ.get('BENCH_DATABASE_NAME',
+                               os.path.join(BENCH_ROOT, 'bench.db'))
+DATABASE_USER = os.environ.get('BENCH_DATABASE_USER', '')
+DATABASE_PASSWORD = os.environ.get('BENCH_DATABASE_PASSWORD', '')
+DATABASE_HOST = os.environ.get('BENCH_DATABASE_HOST', '')
+DATABASE_PORT = os.environ.get('BENCH_DATABASE_PORT', '')
+if DATABASE_ENGINE == 'sqlite3':
+    # concurrent writers wait for each other instead of failing
+    DATABASE_OPTIONS = {'timeout': 60}
+
+# measure ImageCountField(incremental=True) instead of full recount
+BENCH_INCREMENTAL_COUNT = bool(os.environ.get('BENCH_INCREMENTAL_COUNT'))
+
+MEDIA_ROOT = os.path.join(BENCH_ROOT, 'media')
+MEDIA_URL = '/media/'
+
+SITE_ID = 1
+SECRET_KEY = 'benchmarks'
+DEBUG = False
+
+ROOT_URLCONF = 'benchmarks.urls'
+
+INSTALLED_APPS = (
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'generic_images',
+    'benchmarks.bench',
+)
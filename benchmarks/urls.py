@@ -0,0 +1,5 @@
+from django.conf.urls.defaults import *
+
+urlpatterns = patterns('',
+    url(r'^generic_images/', include('generic_images.urls')),
+)
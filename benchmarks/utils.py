@@ -0,0 +1,24 @@
+''' Helpers shared by benchmark scripts. '''
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+# 1x1 transparent GIF
+TINY_GIF = ('GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!'
+            '\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00'
+            '\x00\x02\x02D\x01\x00;')
+
+
+def setup_database():
+    ''' Creates tables for installed apps. '''
+    from django.core.management import call_command
+    call_command('syncdb', interactive=False, verbosity=0)
+
+
+def image_file(name='bench.gif'):
+    from django.core.files.base import ContentFile
+    content = ContentFile(TINY_GIF)
+    content.name = name
+    return content
@@ -4,25 +4,22 @@ from django.contrib.contenttypes.generic import GenericTabularInline
 from django.utils.translation import ugettext_lazy as _
 
 from generic_images.models import AttachedImage
+from generic_images.forms import ImageUploadField
 
 admin.site.register(AttachedImage)
 
 def attachedimage_form_factory(lang='en', debug=False):
     ''' Returns ModelForm class to be used in admin.
-        'lang' is the language for GearsUploader (can be 'en' and 'ru' at the
-        moment).
+        'lang' and 'debug' parameters were used by GearsUploader and are
+        ignored now; they are kept for backwards compatibility.
     '''
-    yui = '' if debug else '.yui'
     class _AttachedImageAdminForm(forms.ModelForm):
 
+        image = ImageUploadField(label=_('Image'))
         caption = forms.CharField(label=_('Caption'), required=False)
 
         class Media:
-            js = [
-                  'generic_images/js/mootools-1.2.4-core-yc.js',
-                  'generic_images/js/GearsUploader.%s%s.js' % (lang, yui,),
-                  'generic_images/js/AttachedImageInline.js',
-            ]
+            js = ['generic_images/js/AttachedImageInline.js']
 
         class Meta:
             model = AttachedImage
@@ -34,9 +31,9 @@ AttachedImageAdminForm = attachedimage_form_factory()
 
 def attachedimages_inline_factory(lang='en', max_width='', debug=False):
     '''  Returns InlineModelAdmin for attached images.
-        'lang' is the language for GearsUploader (can be 'en' and 'ru' at the
-        moment). 'max_width' is default resize width parameter to be set in
-        widget.
+        'lang', 'max_width' and 'debug' parameters were used by
+        GearsUploader and are ignored now; they are kept for backwards
+        compatibility.
     '''
 
     class _AttachedImagesInline(GenericTabularInline):
@@ -49,13 +46,22 @@ def attachedimages_inline_factory(lang='en', max_width='', debug=False):
 
 AttachedImagesInline = attachedimages_inline_factory()
 ''' InlineModelAdmin for attached images.
-    Adds multi-image uploader with progress bar, before-upload image
-    previews and client-side resizing. Uploader is based
-    on GearsUploader (http://bitbucket.org/kmike/gearsuploader/) project.
+    Adds resumable multi-image uploader with progress bar. Files are sent
+    in chunks by several parallel requests (see
+    :mod:`generic_images.uploads`) and are attached in one batch when all
+    of them are received. If upload is interrupted, selecting the same
+    files again continues it.
 
     To make this work copy ``generic_images`` folder from
-    ``generic_images/media/`` to your ``MEDIA_ROOT``. Then use
-    ``AttachedImagesInline`` class for you inlines::
+    ``generic_images/media/`` to your ``MEDIA_ROOT``, include
+    ``generic_images.urls`` in your urlconf and use ``AttachedImagesInline``
+    class for you inlines::
+
+        #urls.py
+
+        urlpatterns += patterns('',
+            url(r'^generic_images/', include('generic_images.urls')),
+        )
 
         #admin.py
 
@@ -67,45 +73,8 @@ AttachedImagesInline = attachedimages_inline_factory()
 
         admin.site.register(MyModel, MyModelAdmin)
 
-
-    Just before standard formset the following uploader is displayed:
-
-    .. image:: img/admin-with-formset.png
-
-    Gears plugin is here
-
-    .. image:: img/admin-nogears.png
-
-    Message is displayed if Gears plugin is not available
-
-    .. image:: img/admin-previews.png
-
     User can select several files at once using Ctrl or Shift keys
-    (Cmd on Mac) in standard OS file selection dialog. He can also remove
-    images from selection by clicking on thumbnails. Several files can also
-    be selected by opening file selection dialog several times.
-
-    .. image:: img/admin-uploading.png
-
-    User presses 'Upload' button and upload process begins
-
-
-    By default the 'Resize ..' checkbox is unchecked and the input field is
-    blank. If it is unchecked then images are not resized before uploading.
-    User can check it and set his max image width.
-
-    In order to set the default value and mark the checkbox as checked by
-    default create customized ``AttachedImagesInline`` class using
-    :func:`attachedimages_inline_factory` function. This function can also be
-    used to change uploader language (language auto-discovering is not
-    implemented)::
-
-        from generic_images.admin import attachedimages_inline_factory
-
-        class MyModelAdmin(admin.ModelAdmin):
-            inlines = [attachedimages_inline_factory(lang='ru', max_width=1024)]
-
-        admin.site.register(MyModel, MyModelAdmin)
-
-
+    (Cmd on Mac) in standard OS file selection dialog. Uploader is not
+    displayed if ``generic_images.urls`` are not included or browser
+    doesn't support File API; standard formset is still available then.
 '''
@@ -0,0 +1,98 @@
+#coding: utf-8
+'''
+Pluggable strategies for choosing ``order`` values and file names of new
+attached images.
+
+:class:`~generic_images.models.AbstractAttachedImage` uses
+:attr:`~generic_images.models.AbstractAttachedImage.order_allocator` and
+:attr:`~generic_images.models.AbstractAttachedImage.file_namer` attributes.
+Override them in subclass (or assign per-instance) to change the strategy::
+
+    from generic_images.allocators import SequenceAllocator, HashFileNamer
+
+    class MyImage(AbstractAttachedImage):
+        order_allocator = SequenceAllocator()
+        file_namer = HashFileNamer()
+
+'''
+import hashlib
+import uuid
+
+from django.db.models import Max
+
+
+class OrderAllocator(object):
+    ''' Base class for order allocators. '''
+
+    def allocate(self, image, count=1):
+        ''' Returns the first value of ``count`` consecutive ``order``
+            values reserved for images attached to the same object as
+            ``image``.
+        '''
+        raise NotImplementedError
+
+
+class MaxOrderAllocator(OrderAllocator):
+    ''' Sets order to max(order)+1 for images attached to the same object.
+        Only the images of one object are aggregated so the query is
+        served by ``(content_type, object_id)`` index.
+        Concurrent writers can get the same order; that only makes
+        their relative ordering ambiguous.
+    '''
+
+    def allocate(self, image, count=1):
+        siblings = image.__class__.objects.filter(
+                                        content_type=image.content_type_id,
+                                        object_id=image.object_id)
+        max_order = siblings.aggregate(m=Max('order'))['m'] or 0
+        return max_order + 1
+
+
+class SequenceAllocator(OrderAllocator):
+    ''' Takes orders from counter table
+        (:class:`~generic_images.models.ImageSequence`). Counter row is
+        incremented atomically so concurrent writers never get the same
+        value. By default there is one counter per object images are
+        attached to; pass ``key`` callable (taking image instance and
+        returning string) to change this.
+    '''
+
+    def __init__(self, key=None):
+        self.key = key or self.default_key
+
+    def default_key(self, image):
+        opts = image._meta
+        return "%s.%s:%s:%s" % (opts.app_label, opts.object_name.lower(),
+                                image.content_type_id, image.object_id)
+
+    def allocate(self, image, count=1):
+        from generic_images.models import ImageSequence
+        # existing images keep their place: sequence starts after them
+        initial = lambda: MaxOrderAllocator().allocate(image) - 1
+        return ImageSequence.objects.next_value(self.key(image), count,
+                                                initial)
+
+
+class UUIDFileNamer(object):
+    ''' Random file names. Doesn't need any queries and file names
+        can't clash so concurrent uploads never overwrite each other.
+    '''
+
+    def get_file_name(self, image, filename):
+        return uuid.uuid4().hex
+
+
+class HashFileNamer(object):
+    ''' File name is the sha1 hex digest of file content.
+        :class:`~generic_images.models.AbstractAttachedImage` sets
+        ``content_hash`` of the file being saved before it is named; for
+        other models the file assigned to ``image`` field is hashed.
+    '''
+
+    def get_file_name(self, image, filename):
+        if getattr(image, 'content_hash', None):
+            return image.content_hash
+        digest = hashlib.sha1()
+        for chunk in image.image.chunks():
+            digest.update(chunk)
+        return digest.hexdigest()
@@ -0,0 +1,122 @@
+'''
+Optional cache of main image and image list for objects images are attached
+to. It is enabled by ``GENERIC_IMAGES_CACHE_TIMEOUT`` setting (in seconds)
+and uses Django's cache framework. Cache entries are keyed by
+``(content_type_id, object_id)`` and per-object version. Images are saved,
+deleted, attached, deleted in bulk and reordered by
+:class:`~generic_images.models.AbstractAttachedImage` and
+:class:`~generic_images.managers.AttachedImageManager` methods that
+invalidate the entry (also when signals are not sent) by changing the
+version, so an entry built by a concurrent request from old data is never
+read.
+
+Entries are accessed through
+:class:`~generic_images.managers.AttachedImageManager` methods::
+
+    main_image = AttachedImage.objects.get_cached_main_for(obj)
+
+    # one cache round trip for the whole list
+    for obj, entry in zip(objects, AttachedImage.objects.get_cached_entries(objects)):
+        print obj, entry['main'], entry['images']
+
+Each entry is a dict with ``'main'`` key (main image instance or None) and
+``'images'`` key (ordered list of ``(image id, image file name)`` tuples).
+If cache is not enabled entries are built from the database on every call.
+'''
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from generic_utils.contenttypes import resolver
+
+CACHE_TIMEOUT = getattr(settings, 'GENERIC_IMAGES_CACHE_TIMEOUT', None)
+
+
+def cache_key(content_type_id, object_id, version):
+    return 'generic_images:%s:%s:%s' % (content_type_id, object_id, version)
+
+
+def version_key(content_type_id, object_id):
+    return 'generic_images:version:%s:%s' % (content_type_id, object_id)
+
+
+def _new_version():
+    # versions that expired are not reused
+    return int(time.time() * 1000000)
+
+
+def _get_versions(version_keys):
+    versions = cache.get_many(version_keys)
+    for key in version_keys:
+        if key not in versions:
+            versions[key] = _new_version()
+            cache.add(key, versions[key], CACHE_TIMEOUT)
+    return versions
+
+
+def get_entries(image_model, objects):
+    ''' Returns cache entries for ``objects`` (in the same order).
+        Versions and cached entries are fetched using two ``get_many``
+        calls, missing entries are built using one query per content type.
+    '''
+    ids = [(resolver.get_id_for_model(obj), obj.pk) for obj in objects]
+    entries, keys = {}, {}
+    if CACHE_TIMEOUT:
+        versions = _get_versions([version_key(*ident) for ident in ids])
+        for ident in ids:
+            keys[ident] = cache_key(ident[0], ident[1], versions[version_key(*ident)])
+        cached = cache.get_many(list(keys.values()))
+        entries = dict([(ident, cached[keys[ident]]) for ident in ids
+                        if keys[ident] in cached])
+
+    missing = [obj for ident, obj in zip(ids, objects) if ident not in entries]
+    if missing:
+        built = _build_entries(image_model, missing)
+        if CACHE_TIMEOUT:
+            # keyed by version read before building: if the entry was
+            # invalidated meanwhile it is stored under the old version
+            to_cache = dict([(keys[ident], entry) for ident, entry in built.items()])
+            if hasattr(cache, 'set_many'):
+                cache.set_many(to_cache, CACHE_TIMEOUT)
+            else:
+                for key, entry in to_cache.items():
+                    cache.set(key, entry, CACHE_TIMEOUT)
+        entries.update(built)
+    return [entries[ident] for ident in ids]
+
+
+def _build_entries(image_model, objects):
+    entries = {}
+    groups = {}
+    for obj in objects:
+        content_type_id = resolver.get_id_for_model(obj)
+        entries[(content_type_id, obj.pk)] = {'main': None, 'images': []}
+        groups.setdefault(content_type_id, []).append(obj.pk)
+
+    for content_type_id, object_ids in groups.items():
+        images = image_model.objects.filter(content_type=content_type_id,
+                                            object_id__in=object_ids)
+        for image in images:
+            entry = entries[(content_type_id, image.object_id)]
+            entry['images'].append((image.pk, image.image.name))
+            if image.is_main:
+                entry['main'] = image
+    return entries
+
+
+def invalidate(obj):
+    ''' Invalidates cache entry for ``obj``. '''
+    invalidate_for(resolver.get_id_for_model(obj), obj.pk)
+
+
+def invalidate_for(content_type_id, object_id):
+    ''' Invalidates cache entry for object with given content type id and
+        primary key by changing its version. '''
+    if CACHE_TIMEOUT:
+        key = version_key(content_type_id, object_id)
+        try:
+            cache.incr(key)
+        except (ValueError, AttributeError): # expired or no incr in backend
+            cache.set(key, _new_version(), CACHE_TIMEOUT)
@@ -7,12 +7,15 @@ Access to this value is much faster than additional "count()" queries.
 '''
 
 from django.db import models
-from django.contrib.contenttypes.models import ContentType
+from django.db.models import F, Count
 from django.contrib.auth.models import User
 
 from composition.base import CompositionField
 from generic_images.models import AttachedImage
-from generic_images.signals import image_saved, image_deleted
+from generic_images.signals import image_saved, image_deleted, images_attached, \
+                                   images_deleted
+from generic_utils.contenttypes import resolver
+from generic_utils.instrumentation import instrumented
 
 
 def force_recalculate(obj):
@@ -36,7 +39,135 @@ def force_recalculate(obj):
         content_object = obj    
     img = Stub()
     image_saved.send(sender = obj.__class__, instance = img)
-    
+
+
+def _recalculate_for_batch(sender, content_object, **kwargs):
+    force_recalculate(content_object)
+
+images_attached.connect(_recalculate_for_batch)
+images_deleted.connect(_recalculate_for_batch)
+
+
+def recalculate_all(since=None, chunk_size=1000, progress=None):
+    ''' Recalculate all ImageCountField and UserImageCountField fields
+        in all models. Use this for repairing values after bulk imports
+        with disabled signals.
+
+        Counts are computed with one GROUP BY query per field and only
+        changed values are written, using one UPDATE per ``chunk_size``
+        holders with the same value.
+
+        If ``since`` (image id) is given only holders that have images with
+        greater ids are recalculated, so recalculation can be repeated
+        incrementally. Note that holders whose images were only deleted
+        are not detected in this case.
+
+        ``progress`` is an optional callable that is called with model,
+        field name, number of processed and number of updated holders
+        after each chunk.
+
+        Returns the number of updated holders.
+    '''
+    updated = 0
+    for model in models.get_models():
+        for field in model._meta.fields:
+            if isinstance(field, (ImageCountField, UserImageCountField)):
+                updated += _recalculate_field(model, field, since,
+                                              chunk_size, progress)
+    return updated
+
+
+def _recalculate_field(model, field, since, chunk_size, progress):
+    if isinstance(field, UserImageCountField):
+        counted_model, key_field = User, field.user_attr
+    else:
+        counted_model, key_field = model, 'pk'
+
+    content_type = resolver.get_for_model(counted_model)
+    images = AttachedImage.objects.filter(content_type=content_type).order_by()
+    holders = model._default_manager.order_by()
+
+    if since is None:
+        chunks = [(images, holders)]
+    else:
+        changed = images.filter(pk__gt=since).\
+                         values_list('object_id', flat=True).distinct()
+        changed = list(changed)
+        chunks = []
+        for start in range(0, len(changed), chunk_size):
+            ids = changed[start:start+chunk_size]
+            chunks.append((images.filter(object_id__in=ids),
+                           holders.filter(**{key_field+'__in': ids})))
+
+    processed = updated = 0
+    for chunk_images, chunk_holders in chunks:
+        counts = dict((row['object_id'], row['n']) for row in
+                      chunk_images.values('object_id').annotate(n=Count('pk')))
+
+        by_value = {}
+        if key_field == 'pk':
+            stored_values = ((pk, pk, stored) for pk, stored in
+                  chunk_holders.values_list('pk', field.attname).iterator())
+        else:
+            stored_values = chunk_holders.values_list('pk', key_field,
+                                                   field.attname).iterator()
+        for pk, key, stored in stored_values:
+            processed += 1
+            value = counts.get(key, 0)
+            if value != stored:
+                by_value.setdefault(value, []).append(pk)
+
+        for value, pks in by_value.items():
+            for start in range(0, len(pks), chunk_size):
+                chunk_pks = pks[start:start+chunk_size]
+                model._default_manager.filter(pk__in=chunk_pks).\
+                                       update(**{field.attname: value})
+                updated += len(chunk_pks)
+                if progress:
+                    progress(model, field.name, processed, updated)
+
+    if progress:
+        progress(model, field.name, processed, updated)
+    return updated
+
+
+class _CountUpdater(object):
+    ''' Trigger action for image count fields.
+
+        In incremental mode the stored value is changed by atomic
+        ``F(field)+1`` / ``F(field)-1`` UPDATE when image is created or
+        deleted and plain image updates are ignored. Full recount is
+        performed for :func:`force_recalculate` and bulk operations.
+    '''
+    def __init__(self, field, get_count, incremental):
+        self.field = field
+        self.get_count = get_count
+        self.incremental = incremental
+
+    @instrumented('ImageCountField.update')
+    def __call__(self, holder, image, signal):
+        if not self.incremental:
+            return self.get_count(holder)
+
+        name = self.field._c_name
+        created = getattr(image, '_image_created', None)
+        if signal is image_deleted:
+            delta = -1
+        elif created is None: # force_recalculate
+            value = self.get_count(holder)
+            self._update(holder, **{name: value})
+            return value
+        elif created:
+            delta = 1
+        else:
+            return getattr(holder, name)
+
+        self._update(holder, **{name: F(name) + delta})
+        return getattr(holder, name) + delta
+
+    def _update(self, holder, **kwargs):
+        holder.__class__._default_manager.filter(pk=holder.pk).update(**kwargs)
+
         
 class ImageCountField(CompositionField):
     ''' Field with model's attached images count.
@@ -58,16 +189,24 @@ class ImageCountField(CompositionField):
             class MyModel2(models.Model):
                 #... fields definitions
                 image_count = ImageCountField(native=models.IntegerField(u'MyModel2 Images count', default=0))
+
+        Pass ``incremental=True`` to avoid 'select count(*)' query on every
+        image save: value is then incremented/decremented in database
+        when image is created/deleted, image updates (caption, is_main,
+        re-uploads) don't touch it and the holder object is not re-saved.
+        Use :func:`force_recalculate` to repair the value if needed.
         
     '''
-    def __init__(self, native=None):
-                        
+    def __init__(self, native=None, incremental=False):
+
+        get_count = lambda model: AttachedImage.objects.get_for_model(model).count()
         self.internal_init(
             native = native or models.PositiveIntegerField(default=0, editable=False),
             trigger = {
                 'on': (image_saved, image_deleted,),
-                'do': lambda model, image, signal: AttachedImage.objects.get_for_model(model).count(),
-                'field_holder_getter': lambda image: image.content_object
+                'do': _CountUpdater(self, get_count, incremental),
+                'field_holder_getter': lambda image: image.content_object,
+                'commit': not incremental,
             }
         )
 
@@ -86,23 +225,25 @@ class UserImageCountField(CompositionField):
         can be overrided using ``user_attr`` argument to ``UserImageCountField`` 
         constructor. As with :class:`~generic_images.fields.ImageCountField`, 
         ``UserImageCountField`` constructor accepts also ``native`` argument - an 
-        underlying field.
+        underlying field and ``incremental`` argument.
         
     """
-    def __init__(self, native=None, user_attr='user'):                        
+    def __init__(self, native=None, user_attr='user', incremental=False):
         
-        def get_field_value(model, image, signal):
+        def get_count(model):
             return AttachedImage.objects.get_for_model(getattr(model, user_attr)).count()
         
         self.internal_init(
             native = native or models.PositiveIntegerField(default=0, editable=False),
             trigger = {
                 'on': (image_saved, image_deleted,),
-                'do': get_field_value,
+                'do': _CountUpdater(self, get_count, incremental),
                 'field_holder_getter': lambda image: image.content_object.get_profile(),
                 'sender_model': User,
+                'commit': not incremental,
             }
-        )        
+        )
+        self.user_attr = user_attr
         
 #class ImageCountField(CompositionField):
 #    def __init__(self, native=None, signal=None):
@@ -1,11 +1,51 @@
 #coding: utf-8
 from django import forms
+from django.utils.translation import ugettext_lazy as _
 
 from generic_images.models import AttachedImage
+from generic_images.image_info import read_image_info, get_image_error, \
+                                      MAX_PIXELS
+
+
+class ImageUploadField(forms.FileField):
+    ''' Image field that validates uploaded file using the image header
+        only (format and number of pixels, see
+        :mod:`generic_images.image_info`). Unlike ``forms.ImageField`` it
+        doesn't decode the whole image and doesn't read the file into
+        memory. Header data collected by
+        :class:`~generic_images.uploadhandler.StreamingImageUploadHandler`
+        is used if it is available.
+    '''
+    default_error_messages = {
+        'invalid_image': _(u"Upload a valid image. The file you uploaded was "
+                           u"either not an image or a corrupted image."),
+        'invalid_format': _(u"Image format %(format)s is not supported."),
+        'too_many_pixels': _(u"Image is too large (%(width)sx%(height)s). "
+                             u"Maximum is %(max_pixels)s pixels."),
+    }
+
+    def clean(self, data, initial=None):
+        f = super(ImageUploadField, self).clean(data, initial)
+        if not data: # nothing is uploaded
+            return f
+
+        info = getattr(data, 'image_info', None)
+        if info is None:
+            info = read_image_info(data, with_hash=False)
+            error = get_image_error(info)
+        else:
+            error = data.image_error
+        if error is not None:
+            params = dict(info, max_pixels=MAX_PIXELS)
+            raise forms.ValidationError(self.error_messages[error] % params)
+        return f
+
 
 class AttachedImageForm(forms.ModelForm):
     ''' Simple form for AttachedImage model with ``image`` and ``caption`` fields.'''
 
+    image = ImageUploadField(label=_('Image'))
+
     class Meta:
         model = AttachedImage
         fields = ['image', 'caption']
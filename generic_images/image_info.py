@@ -0,0 +1,99 @@
+'''
+Reading image metadata (dimensions, format, file size and content hash)
+without decoding the whole image.
+
+Uploaded images are checked using the header only: format must be one of
+``GENERIC_IMAGES_UPLOAD_FORMATS`` (default is JPEG, PNG and GIF) and
+number of pixels must not exceed ``GENERIC_IMAGES_MAX_PIXELS`` (default is
+50 megapixels) so images that would take too much memory to decode
+("decompression bombs") are rejected before they are opened by PIL.
+'''
+import hashlib
+
+try:
+    from PIL import ImageFile
+except ImportError:
+    import ImageFile
+
+from django.conf import settings
+
+MAX_PIXELS = getattr(settings, 'GENERIC_IMAGES_MAX_PIXELS', 50*1000*1000)
+UPLOAD_FORMATS = getattr(settings, 'GENERIC_IMAGES_UPLOAD_FORMATS',
+                         ('JPEG', 'PNG', 'GIF'))
+
+# header is expected to be found in this many first bytes
+MAX_HEADER_SIZE = 1024*1024
+
+
+class ImageInfoReader(object):
+    ''' Collects image metadata from file chunks passed to :meth:`feed`.
+        Only the header is parsed by PIL. '''
+
+    def __init__(self, with_hash=True):
+        self.parser = ImageFile.Parser()
+        self.digest = with_hash and hashlib.sha1() or None
+        self.info = dict(width=None, height=None, format=None, file_size=0,
+                         content_hash=None)
+
+    @property
+    def header_parsed(self):
+        ''' True if header was parsed or the data is not a valid image. '''
+        return self.parser is None
+
+    def feed(self, chunk):
+        self.info['file_size'] += len(chunk)
+        if self.digest is not None:
+            self.digest.update(chunk)
+        if self.parser is None:
+            return
+        try:
+            self.parser.feed(chunk)
+        except (IOError, ValueError, SyntaxError):
+            self.parser = None
+            return
+        if self.parser.image is not None:
+            self.info['width'], self.info['height'] = self.parser.image.size
+            self.info['format'] = self.parser.image.format
+            self.parser = None
+        elif self.info['file_size'] > MAX_HEADER_SIZE:
+            self.parser = None
+
+    def get_info(self):
+        ''' Returns dict with ``width``, ``height``, ``format``,
+            ``file_size`` and ``content_hash`` keys. '''
+        info = self.info.copy()
+        if self.digest is not None:
+            info['content_hash'] = self.digest.hexdigest()
+        return info
+
+
+def read_image_info(content, with_hash=True, chunk_size=64*1024):
+    ''' Returns dict with ``width``, ``height``, ``format``, ``file_size``
+        and ``content_hash`` (sha1 hex digest) of image file ``content``
+        (django File). File is read in chunks; only the header is parsed
+        by PIL. If ``with_hash`` is False reading stops as soon as the
+        header is parsed and ``content_hash`` is None.
+        Dimensions and format are None if the file is not a valid image.
+    '''
+    reader = ImageInfoReader(with_hash)
+    for chunk in content.chunks(chunk_size):
+        reader.feed(chunk)
+        if reader.header_parsed and not with_hash:
+            break
+    info = reader.get_info()
+    if not with_hash:
+        info['file_size'] = content.size
+    return info
+
+
+def get_image_error(info):
+    ''' Returns error code (``'invalid_image'``, ``'invalid_format'`` or
+        ``'too_many_pixels'``) for image described by ``info`` dict or
+        None if image can be accepted. '''
+    if info['format'] is None:
+        return 'invalid_image'
+    if info['format'] not in UPLOAD_FORMATS:
+        return 'invalid_format'
+    if info['width'] * info['height'] > MAX_PIXELS:
+        return 'too_many_pixels'
+    return None
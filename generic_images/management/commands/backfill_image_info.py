@@ -0,0 +1,48 @@
+import sys
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from generic_images.models import AttachedImage
+
+INFO_FIELDS = ('width', 'height', 'file_size', 'format', 'content_hash')
+
+
+class Command(NoArgsCommand):
+    help = ("Fills width, height, file_size, format and content_hash of "
+            "attached images uploaded before these fields were added.")
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--chunk-size', dest='chunk_size', type='int',
+            default=500, help='Number of images fetched by one query.'),
+        make_option('--no-hash', dest='with_hash', action='store_false',
+            default=True, help="Don't calculate content hash. Only image "
+                               "headers are read then."),
+    )
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+        queryset = AttachedImage.objects.filter(width__isnull=True).order_by('pk')
+        last_pk, updated, failed = 0, 0, 0
+
+        while True:
+            chunk = list(queryset.filter(pk__gt=last_pk)[:options['chunk_size']])
+            if not chunk:
+                break
+            for image in chunk:
+                last_pk = image.pk
+                try:
+                    image.update_image_info(with_hash=options['with_hash'])
+                except (IOError, OSError):
+                    failed += 1
+                    if verbosity > 1:
+                        sys.stderr.write("%s: %s\n" % (image.image.name,
+                                                        sys.exc_info()[1]))
+                    continue
+                # plain update: no signals and no file handling
+                AttachedImage.objects.filter(pk=image.pk).update(
+                    **dict((name, getattr(image, name)) for name in INFO_FIELDS))
+                updated += 1
+
+        if verbosity:
+            sys.stdout.write("%d images updated, %d failed.\n" % (updated, failed))
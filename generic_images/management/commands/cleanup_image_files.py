@@ -0,0 +1,33 @@
+import sys
+from datetime import timedelta
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from generic_images.models import PendingFileDeletion, UploadSession
+
+
+class Command(NoArgsCommand):
+    help = ("Deletes files of replaced and deleted images queued in "
+            "PendingFileDeletion and removes expired chunked uploads. "
+            "Run it periodically (e.g. from cron).")
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--batch-size', dest='batch_size', type='int',
+            default=100, help='Number of files processed per batch.'),
+        make_option('--max-attempts', dest='max_attempts', type='int',
+            default=5, help='Files that failed to be deleted this many '
+                            'times are skipped.'),
+        make_option('--upload-max-age', dest='upload_max_age', type='int',
+            default=24, help='Chunked uploads not completed in this many '
+                             'hours are removed.'),
+    )
+
+    def handle_noargs(self, **options):
+        expired = UploadSession.objects.expire(
+                                timedelta(hours=options['upload_max_age']))
+        deleted, failed = PendingFileDeletion.objects.process(
+                                options['batch_size'], options['max_attempts'])
+        if int(options.get('verbosity', 1)):
+            sys.stdout.write("%d files deleted, %d failed, %d uploads "
+                             "expired.\n" % (deleted, failed, expired))
@@ -0,0 +1,42 @@
+import sys
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand, CommandError
+from django.db.models import Max
+
+from generic_images.models import AttachedImage
+
+
+class Command(NoArgsCommand):
+    help = ("Recalculates all ImageCountField and UserImageCountField values "
+            "using GROUP BY queries and chunked updates.")
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--since', dest='since', type='int', default=None,
+            help='Only recalculate objects that have images with id greater '
+                 'than this value. Last image id is printed at the end '
+                 'so it can be used for the next run.'),
+        make_option('--chunk-size', dest='chunk_size', type='int',
+            default=1000, help='Number of objects updated by one query.'),
+    )
+
+    def handle_noargs(self, **options):
+        try:
+            from generic_images.fields import recalculate_all
+        except ImportError:
+            raise CommandError("django-composition is required for image "
+                               "count fields.")
+
+        verbosity = int(options.get('verbosity', 1))
+        last_pk = AttachedImage.objects.aggregate(m=Max('pk'))['m'] or 0
+
+        def progress(model, field_name, processed, updated):
+            if verbosity > 1:
+                sys.stdout.write("%s.%s: %d processed, %d updated\n" % (
+                    model._meta.object_name, field_name, processed, updated))
+
+        updated = recalculate_all(options['since'], options['chunk_size'],
+                                  progress)
+        if verbosity:
+            sys.stdout.write("%d objects updated. Use --since=%d for the "
+                             "next run.\n" % (updated, last_pk))
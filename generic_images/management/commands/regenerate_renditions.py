@@ -0,0 +1,157 @@
+import os
+import sys
+import time
+from multiprocessing import Pool, cpu_count
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand, CommandError
+from django.db import connection
+
+from generic_images.context_processors import THUMB_TYPES
+from generic_images.models import AttachedImage, ImageRendition
+from generic_images.renditions import render_files, get_stale_types, \
+                                      store_rendition
+
+
+def _render(job):
+    pk, image_name, sizes = job
+    try:
+        return pk, render_files(image_name, sizes), None
+    except Exception:
+        return pk, None, "%s: %s" % (image_name, sys.exc_info()[1])
+
+
+def read_checkpoint(checkpoint):
+    ''' Returns (last processed id, set of ids of failed images) stored
+        by :func:`write_checkpoint`. '''
+    lines = open(checkpoint).read().split('\n')
+    last_pk = int(lines[0].strip() or 0)
+    failed = set()
+    if len(lines) > 1:
+        failed = set([int(pk) for pk in lines[1].split(',') if pk.strip()])
+    return last_pk, failed
+
+
+def write_checkpoint(checkpoint, last_pk, failed):
+    out = open(checkpoint, 'w')
+    try:
+        out.write("%d\n%s\n" % (last_pk, ",".join([str(pk) for pk in sorted(failed)])))
+    finally:
+        out.close()
+
+
+class Command(NoArgsCommand):
+    help = ("Creates missing and out-of-date renditions for all attached "
+            "images using a pool of worker processes.")
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--types', dest='types', default=None,
+            help='Comma-separated THUMBNAIL_TYPES keys (default is all).'),
+        make_option('--force', action='store_true', dest='force',
+            default=False, help='Recreate up-to-date renditions too.'),
+        make_option('--processes', dest='processes', type='int',
+            default=None, help='Number of worker processes '
+                               '(default is the number of CPUs).'),
+        make_option('--chunk-size', dest='chunk_size', type='int',
+            default=500, help='Number of images read from database at once.'),
+        make_option('--checkpoint', dest='checkpoint', default=None,
+            help='File with id of the last processed image and ids of '
+                 'images that failed. Failed images are retried and '
+                 'processing is resumed after the last id; the file is '
+                 'updated after each chunk.'),
+    )
+
+    def handle_noargs(self, **options):
+        thumbnail_types = THUMB_TYPES.keys()
+        if options['types']:
+            thumbnail_types = options['types'].split(',')
+            unknown = [t for t in thumbnail_types if t not in THUMB_TYPES]
+            if unknown:
+                raise CommandError("Unknown thumbnail types: %s" % ", ".join(unknown))
+        self.thumbnail_types = thumbnail_types
+        self.force = options['force']
+
+        checkpoint = options['checkpoint']
+        chunk_size = options['chunk_size']
+        last_pk, failed = 0, set()
+        if checkpoint and os.path.exists(checkpoint):
+            last_pk, failed = read_checkpoint(checkpoint)
+
+        verbosity = int(options.get('verbosity', 1))
+        # forked workers must not share database connection
+        connection.close()
+        self.pool = Pool(options['processes'] or cpu_count())
+
+        processed = rendered = 0
+        errors = []
+        start = time.time()
+        try:
+            # images that failed in previous runs are retried first
+            retry = sorted(failed)
+            while True:
+                if retry:
+                    pks, retry = retry[:chunk_size], retry[chunk_size:]
+                    images = list(AttachedImage.objects.filter(pk__in=pks).
+                                                order_by('pk'))
+                else:
+                    images = list(AttachedImage.objects.filter(pk__gt=last_pk).
+                                                order_by('pk')[:chunk_size])
+                    if not images:
+                        break
+                    pks = [image.pk for image in images]
+                    last_pk = images[-1].pk
+
+                chunk_rendered, chunk_errors = self.process(images)
+                rendered += chunk_rendered
+                errors.extend(chunk_errors.values())
+                failed.difference_update(pks)
+                failed.update(chunk_errors.keys())
+
+                processed += len(images)
+                if checkpoint:
+                    write_checkpoint(checkpoint, last_pk, failed)
+                if verbosity:
+                    elapsed = time.time() - start
+                    sys.stdout.write("%d images processed, %d rendered, "
+                                     "%.1f images/s, last id %d\n" % (
+                                     processed, rendered,
+                                     processed / max(elapsed, 0.001), last_pk))
+        finally:
+            self.pool.close()
+            self.pool.join()
+
+        for error in errors:
+            sys.stderr.write("Error: %s\n" % error)
+        if errors:
+            raise CommandError("Renditions of %d images were not created" %
+                               len(errors))
+
+    def process(self, images):
+        ''' Renders stale renditions of ``images`` in worker processes.
+            Returns number of rendered images and dict of errors by image
+            id. '''
+        ImageRendition.injector.inject_list_to(images, '_rendition_list')
+
+        jobs = []
+        by_pk = {}
+        for image in images:
+            existing = dict((r.thumbnail_type, r) for r in image._rendition_list)
+            stale = get_stale_types(image, existing, self.thumbnail_types,
+                                    self.force)
+            if stale and image.image.name:
+                sizes = [(t, THUMB_TYPES[t]) for t in stale]
+                jobs.append((image.pk, image.image.name, sizes))
+                by_pk[image.pk] = (image, existing)
+
+        rendered = 0
+        errors = {}
+        for pk, results, error in self.pool.imap_unordered(_render, jobs):
+            if error:
+                errors[pk] = error
+                continue
+            image, existing = by_pk[pk]
+            for thumbnail_type, size, name, width, height in results:
+                store_rendition(image, thumbnail_type, size, name,
+                                width, height, existing.get(thumbnail_type))
+            rendered += 1
+        return rendered, errors
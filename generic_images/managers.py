@@ -1,8 +1,19 @@
-from django.db import models
-from django.contrib.contenttypes.models import ContentType
-from django.db.models import get_model
+import sys
+from datetime import datetime
 
-from generic_utils.managers import GenericModelManager
+from django.db import models, transaction, connection, IntegrityError
+from django.db.models import get_model, F
+from django.utils.encoding import force_unicode
+
+from generic_images import cache as image_cache
+from generic_images.signals import images_attached, images_reordered, \
+                                   images_deleted
+from generic_utils.managers import GenericModelManager, InjectingQuerySet
+from generic_utils.db import bulk_insert, bulk_update, bulk_delete, \
+                             mark_dirty, commit_on_success_unless_managed
+from generic_utils.pagination import keyset_page
+from generic_utils.contenttypes import resolver
+from generic_utils.instrumentation import instrumented
 
 
 def get_model_class_by_name(name):
@@ -11,6 +22,54 @@ def get_model_class_by_name(name):
     return model
 
 
+class ImagesQuerySet(InjectingQuerySet):
+    """ QuerySet with methods for prefetching attached images. """
+    image_model_class = None
+
+    def with_main_image(self, field_name='main_image'):
+        ''' Returns QuerySet whose objects will have their main images
+            accessible as ``field_name`` attribute. Images are selected
+            when the QuerySet is evaluated using one additional query.
+        '''
+        return self.inject(self._get_image_model_class().injector, field_name,
+                           is_main=True)
+
+    def with_images(self, field_name='images', limit=None):
+        ''' Returns QuerySet whose objects will have lists of their images
+            (at most ``limit`` images per object) accessible as
+            ``field_name`` attribute. Images are selected using one
+            additional query.
+        '''
+        return self.inject_list(self._get_image_model_class().injector,
+                                field_name, limit=limit)
+
+    def with_image_count(self, field_name='image_count'):
+        ''' Returns QuerySet whose objects will have number of their images
+            accessible as ``field_name`` attribute. Counts are selected using
+            one additional GROUP BY query.
+        '''
+        return self.inject_count(self._get_image_model_class().injector,
+                                 field_name)
+
+    def _get_image_model_class(self):
+        return self.image_model_class or \
+               get_model_class_by_name('generic_images.AttachedImage')
+
+    def _clone(self, klass=None, setup=False, **kwargs):
+        kwargs.setdefault('image_model_class', self.image_model_class)
+        return super(ImagesQuerySet, self)._clone(klass, setup, **kwargs)
+
+
+def with_main_image(queryset, field_name='main_image', image_model_class=None):
+    ''' Returns lazy copy of arbitrary ``queryset`` with main images injected
+        as ``field_name`` attribute of its objects
+        (see :meth:`ImagesQuerySet.with_main_image`).
+    '''
+    queryset = queryset._clone(klass=ImagesQuerySet,
+                               image_model_class=image_model_class)
+    return queryset.with_main_image(field_name)
+
+
 class ImagesAndUserManager(models.Manager):
     """ Useful manager for models that have AttachedImage (or subclass) field
         and 'injector=GenericIngector()' manager.        
@@ -22,16 +81,26 @@ class ImagesAndUserManager(models.Manager):
             image_model_class = 'generic_images.AttachedImage'
         self.image_model_class = get_model_class_by_name(image_model_class)
         super(ImagesAndUserManager, self).__init__(*args, **kwargs)
-        
+
+    def get_query_set(self):
+        queryset = ImagesQuerySet(self.model)
+        queryset.image_model_class = self.image_model_class
+        return queryset
+
+    def with_main_image(self, field_name='main_image'):
+        ''' Returns QuerySet with main images injected as ``field_name``
+            attribute of objects, see :meth:`ImagesQuerySet.with_main_image`.
+        '''
+        return self.get_query_set().with_main_image(field_name)
+
     def select_with_main_images(self, limit=None, **kwargs):
         ''' Select all objects with filters passed as kwargs.   
             For each object it's main image instance is accessible as ``object.main_image``.
             Results can be limited using ``limit`` parameter.
-            Selection is performed using only 2 or 3 sql queries.            
+            Selection is performed using only 2 or 3 sql queries when
+            the returned QuerySet is evaluated.
         '''
-        objects = self.get_query_set().filter(**kwargs)[:limit]
-        self.image_model_class.injector.inject_to(objects,'main_image', is_main=True)
-        return objects
+        return self.with_main_image().filter(**kwargs)[:limit]
     
     def for_user_with_main_images(self, user, limit=None):
         return self.select_with_main_images(user=user, limit=limit)
@@ -51,6 +120,7 @@ class AttachedImageManager(GenericModelManager):
         '''
         return self.for_model(model) 
             
+    @instrumented('AttachedImageManager.get_main_for')
     def get_main_for(self, model):
         '''
         Returns main image for given model
@@ -59,4 +129,408 @@ class AttachedImageManager(GenericModelManager):
             return self.for_model(model).get(is_main=True)
         except models.ObjectDoesNotExist:
             return None
-            
+
+    @instrumented('AttachedImageManager.page_for')
+    def page_for(self, model, cursor=None, per_page=20):
+        '''
+        Returns :class:`~generic_utils.pagination.KeysetPage` with images
+        attached to given model in album order (``-order, -pk``) starting
+        after ``cursor`` (string returned as ``next_cursor`` or
+        ``previous_cursor`` of another page). Pages are selected by seeking
+        on ``(order, pk)`` using one query so deep pages are as fast as the
+        first one. See also :func:`~generic_utils.pagination.get_page_or_404`.
+        '''
+        return keyset_page(self.for_model(model), 'order', cursor, per_page)
+
+    def get_cached_main_for(self, model):
+        '''
+        Returns main image for given model using
+        :mod:`generic_images.cache`.
+        '''
+        return self.get_cached_entries([model])[0]['main']
+
+    def get_cached_images_for(self, model):
+        '''
+        Returns ordered list of ``(image id, image file name)`` tuples for
+        images attached to given model using :mod:`generic_images.cache`.
+        '''
+        return self.get_cached_entries([model])[0]['images']
+
+    @instrumented('AttachedImageManager.get_cached_entries')
+    def get_cached_entries(self, objects):
+        '''
+        Returns :mod:`generic_images.cache` entries for all ``objects``
+        using one cache round trip.
+        '''
+        return image_cache.get_entries(self.model, list(objects))
+
+    @instrumented('AttachedImageManager.bulk_attach')
+    def bulk_attach(self, obj, files, user=None, captions=None,
+                    main_index=None, batch_size=100, send_signal=True):
+        ''' Attaches images for all ``files`` to ``obj`` at once and returns
+            the list of created images.
+
+            ``captions`` is an optional list of captions (one per file,
+            ``ValueError`` is raised if its length differs),
+            ``main_index`` is the index of file that should become the main
+            image.
+
+            Orders are allocated once for the whole batch, rows are inserted
+            using batched INSERTs in one transaction and ``image_saved`` is
+            not sent for individual images. Instead one
+            :data:`~generic_images.signals.images_attached` signal is sent
+            (unless ``send_signal`` is False); it is handled by
+            :class:`~generic_images.fields.ImageCountField` so denormalised
+            counts are recalculated once per batch.
+        '''
+        files = list(files)
+        if not files:
+            return []
+        if captions is None:
+            captions = ['']*len(files)
+        elif len(captions) != len(files):
+            raise ValueError("captions must contain one caption per file "
+                             "(%d captions for %d files)." % (len(captions),
+                                                              len(files)))
+        content_type = resolver.get_for_model(obj)
+
+        images = [self.model(content_type=content_type, object_id=obj.pk,
+                             user=user, caption=caption)
+                  for caption in captions]
+        first_order = self.model.order_allocator.allocate(images[0], len(images))
+        for index, (image, content) in enumerate(zip(images, files)):
+            image.order = first_order + index
+            image.is_main = (index == main_index)
+            image.store_file(content)
+
+        self._insert_attached(obj, content_type, images, main_index is not None,
+                              batch_size)
+
+        # deduplicated images can share file name, order is unique in batch
+        names = [image.image.name for image in images]
+        siblings = self.for_model(obj, content_type)
+        pks = {}
+        for start in range(0, len(names), batch_size):
+            chunk = names[start:start+batch_size]
+            rows = siblings.filter(image__in=chunk).values_list('image', 'order', 'pk')
+            pks.update(((name, order), pk) for name, order, pk in rows)
+        for image in images:
+            image.pk = pks.get((image.image.name, image.order))
+
+        image_cache.invalidate_for(content_type.pk, obj.pk)
+        if send_signal:
+            images_attached.send(sender=obj.__class__, content_object=obj,
+                                 images=images)
+        return images
+
+    @commit_on_success_unless_managed
+    def _insert_attached(self, obj, content_type, images, has_main, batch_size):
+        from generic_images.models import ImageBlob
+        for image in images:
+            if image._blob_name:
+                ImageBlob.objects.acquire(image._blob_name)
+        if has_main:
+            self._unset_main(content_type.pk, obj.pk)
+        bulk_insert(self.model, images, batch_size)
+
+    @instrumented('AttachedImageManager.delete_for')
+    def delete_for(self, obj_or_queryset, chunk_size=500, send_signal=True):
+        ''' Deletes all images attached to ``obj_or_queryset`` (model
+            instance) or all images from ``obj_or_queryset`` (QuerySet of
+            images, e.g. ``AttachedImage.objects.filter(user=user)``) and
+            returns the number of deleted images.
+
+            Image ids and file names are selected by one query, rows are
+            deleted by ``chunk_size`` in separate transactions (or in the
+            caller's transaction if it is managed) together with their
+            renditions, files are queued for deletion (see
+            :class:`~generic_images.models.PendingFileDeletion`) in the same
+            transactions. Each chunk takes a constant number of queries and
+            no ``pre_delete``/``post_delete`` signals are sent unless other
+            models refer to images (then Django collects related objects of
+            every image). Image ``delete`` method is not called. Instead of
+            per-image ``image_deleted`` signals one
+            :data:`~generic_images.signals.images_deleted` signal is sent for
+            each object images were attached to (unless ``send_signal`` is
+            False) so denormalised counts are recalculated once per object.
+        '''
+        rows = self._rows_to_delete(obj_or_queryset)
+        for start in range(0, len(rows), chunk_size):
+            self._delete_chunk(rows[start:start+chunk_size])
+        self._invalidate_cache(rows)
+        if send_signal:
+            self._send_deleted(rows)
+        return len(rows)
+
+    def _rows_to_delete(self, obj_or_queryset):
+        if isinstance(obj_or_queryset, models.Model):
+            images = self.for_model(obj_or_queryset)
+        else:
+            images = obj_or_queryset.all()
+        return list(images.order_by().values_list('pk', 'image',
+                                                  'content_type', 'object_id'))
+
+    @commit_on_success_unless_managed
+    def _delete_chunk(self, rows):
+        self._delete_rows(rows)
+
+    def _delete_rows(self, rows):
+        ''' Deletes image rows and queues their files (and files of their
+            renditions) for deletion in the caller's transaction. '''
+        from generic_images.models import AttachedImage, ImageBlob, \
+                                          ImageRendition, PendingFileDeletion, \
+                                          BLOB_DIR
+        pks = [row[0] for row in rows]
+        related = self._batch_deletable_related()
+        if related is not None:
+            if ImageRendition in related:
+                renditions = list(ImageRendition.objects.filter(image__in=pks).
+                                                         values_list('pk', 'name'))
+                bulk_delete(ImageRendition, [pk for pk, name in renditions])
+                PendingFileDeletion.objects.enqueue_many(AttachedImage,
+                                            [name for pk, name in renditions])
+            bulk_delete(self.model, pks)
+        else:
+            # Django has to collect and delete objects referring to images
+            # (one query per image).
+            self.filter(pk__in=pks).delete()
+        references = {}
+        for pk, name, content_type_id, object_id in rows:
+            references[name] = references.get(name, 0) + 1
+        unused = [name for name, count in references.items()
+                  if name and (not name.startswith(BLOB_DIR) or
+                               ImageBlob.objects.release(name, count))]
+        PendingFileDeletion.objects.enqueue_many(self.model, unused)
+
+    def _batch_deletable_related(self):
+        ''' Returns set of models referring to image rows if the rows can
+            be deleted by plain DELETE queries (nothing but renditions of
+            ``self.model`` refers to them), None otherwise. '''
+        from generic_images.models import ImageRendition
+        opts = self.model._meta
+        if opts.parents or opts.many_to_many or \
+                opts.get_all_related_many_to_many_objects():
+            return None
+        related = set()
+        for relation in opts.get_all_related_objects():
+            if relation.model is not ImageRendition or \
+                    relation.field.rel.to is not self.model:
+                return None
+            related.add(relation.model)
+        return related
+
+    def _invalidate_cache(self, rows):
+        objects = set([(content_type_id, object_id)
+                       for pk, name, content_type_id, object_id in rows])
+        for content_type_id, object_id in objects:
+            image_cache.invalidate_for(content_type_id, object_id)
+
+    def _send_deleted(self, rows):
+        by_object = {}
+        for pk, name, content_type_id, object_id in rows:
+            by_object.setdefault((content_type_id, object_id), []).append(pk)
+        object_ids = {}
+        for content_type_id, object_id in by_object:
+            object_ids.setdefault(content_type_id, []).append(object_id)
+
+        for content_type_id, ids in object_ids.items():
+            model = resolver.get_model(content_type_id)
+            # objects that were deleted themselves don't need updates
+            for object_id, obj in model._default_manager.in_bulk(ids).items():
+                images_deleted.send(sender=model, content_object=obj,
+                                    images=by_object[(content_type_id, object_id)])
+
+    @instrumented('AttachedImageManager.reorder')
+    def reorder(self, obj, ids_in_order, send_signal=True):
+        ''' Changes album order of images attached to ``obj``.
+            ``ids_in_order`` is the list of image ids in the new order (the
+            first image is shown first); images that are not in the list
+            are placed after listed ones keeping their relative order.
+            Orders are rewritten in one transaction (the caller's
+            transaction if it is managed) using one SELECT and batched
+            ``CASE`` UPDATEs for changed rows only; image ``save``
+            is not called. One
+            :data:`~generic_images.signals.images_reordered` signal is sent
+            (unless ``send_signal`` is False).
+            Returns the number of updated images.
+        '''
+        ids, updated = self._reorder(obj, ids_in_order)
+        image_cache.invalidate(obj)
+        if send_signal:
+            images_reordered.send(sender=obj.__class__, content_object=obj,
+                                  images=ids)
+        return updated
+
+    @commit_on_success_unless_managed
+    def _reorder(self, obj, ids_in_order):
+        current = list(self.for_model(obj).order_by('-order', '-pk').
+                                           values_list('pk', 'order'))
+        orders = dict(current)
+        ids_in_order = [int(pk) for pk in ids_in_order]
+        unknown = set(ids_in_order) - set(orders)
+        if unknown or len(set(ids_in_order)) != len(ids_in_order):
+            raise ValueError("ids_in_order must contain unique ids of images "
+                             "attached to the object.")
+
+        listed = set(ids_in_order)
+        ids = ids_in_order + [pk for pk, order in current if pk not in listed]
+        new_orders = dict((pk, len(ids) - index) for index, pk in enumerate(ids))
+        changed = dict((pk, order) for pk, order in new_orders.items()
+                       if orders[pk] != order)
+        bulk_update(self.model, 'order', changed)
+        return ids, len(changed)
+
+    @instrumented('AttachedImageManager.set_main')
+    @commit_on_success_unless_managed
+    def set_main(self, image):
+        ''' Makes ``image`` the main image of the object it is attached to.
+            Only two rows are updated (previous main image and ``image``)
+            using at most two UPDATE queries; signals are not sent.
+        '''
+        self._unset_main(image.content_type_id, image.object_id, image.pk)
+        self.filter(pk=image.pk, is_main=False).update(is_main=True)
+        image.is_main = True
+        image_cache.invalidate_for(image.content_type_id, image.object_id)
+
+    def _unset_main(self, content_type_id, object_id, exclude_pk=None):
+        main = self.filter(content_type=content_type_id, object_id=object_id,
+                           is_main=True)
+        if exclude_pk is not None:
+            main = main.exclude(pk=exclude_pk)
+        main.update(is_main=False)
+
+
+class ImageSequenceManager(models.Manager):
+    ''' Manager for :class:`~generic_images.models.ImageSequence` counters.
+    '''
+
+    @commit_on_success_unless_managed
+    def next_value(self, name, count=1, initial=0):
+        ''' Reserves ``count`` consecutive values of counter ``name`` and
+            returns the first of them. ``initial`` (value or callable) is
+            the value of counter if it doesn't exist yet.
+            Counter row stays locked by UPDATE until the transaction (the
+            caller's transaction if it is managed) is committed so
+            concurrent callers can't get the same value.
+        '''
+        try:
+            sequence = self.get(name=name)
+        except self.model.DoesNotExist:
+            if callable(initial):
+                initial = initial()
+            sequence, created = self.get_or_create(name=name,
+                                                   defaults={'value': initial})
+        self.filter(pk=sequence.pk).update(value=F('value') + count)
+        value = self.filter(pk=sequence.pk).values_list('value', flat=True)[0]
+        return value - count + 1
+
+
+class ImageBlobManager(models.Manager):
+    ''' Manager for :class:`~generic_images.models.ImageBlob` reference
+        counters.
+    '''
+
+    def acquire(self, name):
+        ''' Adds reference to blob ``name`` (blob row is created if it
+            doesn't exist). It runs in the caller's transaction, call it
+            in the transaction that saves the referencing row. '''
+        if self.filter(name=name).update(ref_count=F('ref_count') + 1):
+            return
+        sid = transaction.savepoint()
+        try:
+            self.create(name=name, ref_count=1)
+            transaction.savepoint_commit(sid)
+        except IntegrityError: # created by concurrent upload
+            transaction.savepoint_rollback(sid)
+            self.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+    def release(self, name, count=1):
+        ''' Removes ``count`` references to blob ``name``. Returns True if
+            file ``name`` is not referenced anymore and should be deleted
+            (also if it is not a blob at all). Blob row is deleted together
+            with the last reference. It runs in the caller's transaction.
+        '''
+        if not self.filter(name=name).update(ref_count=F('ref_count') - count):
+            return True
+        qn = connection.ops.quote_name
+        cursor = connection.cursor()
+        # concurrent acquire() can add reference before the row is deleted
+        cursor.execute("DELETE FROM %s WHERE %s = %%s AND %s <= 0" % (
+                            qn(self.model._meta.db_table), qn('name'),
+                            qn('ref_count')), [name])
+        deleted = cursor.rowcount > 0
+        mark_dirty()
+        return deleted
+
+
+class UploadSessionManager(models.Manager):
+    ''' Manager for :class:`~generic_images.models.UploadSession`. '''
+
+    def expire(self, max_age):
+        ''' Discards upload sessions started more than ``max_age``
+            (timedelta) ago. Returns the number of discarded sessions. '''
+        sessions = list(self.filter(created_at__lt=datetime.now() - max_age))
+        for session in sessions:
+            session.discard()
+        return len(sessions)
+
+
+class PendingFileDeletionManager(models.Manager):
+    ''' Manager for :class:`~generic_images.models.PendingFileDeletion`
+        queue.
+    '''
+
+    def enqueue(self, model, name, field_name='image'):
+        ''' Schedules deletion of file ``name`` stored by ``field_name``
+            field of ``model`` (model class or instance; the field's
+            storage will be used). '''
+        if not name:
+            return None
+        return self.create(content_type_id=resolver.get_id_for_model(model),
+                           field_name=field_name, name=name)
+
+    def enqueue_many(self, model, names, field_name='image', batch_size=100):
+        ''' Schedules deletion of all files from ``names`` list using
+            batched INSERTs (see :meth:`enqueue`). '''
+        content_type_id = resolver.get_id_for_model(model)
+        bulk_insert(self.model, [self.model(content_type_id=content_type_id,
+                                            field_name=field_name, name=name)
+                                 for name in names if name], batch_size)
+
+    def process(self, batch_size=100, max_attempts=5):
+        ''' Deletes queued files through their field storages. Files are
+            processed in batches of ``batch_size``. Failed deletions are
+            retried on next calls until ``max_attempts`` is reached.
+            Returns (number of deleted files, number of failures) tuple.
+            Files of blobs that were referenced again after being queued
+            are not deleted.
+        '''
+        from generic_images.models import ImageBlob
+        deleted = failed = 0
+        last_pk = 0
+        while True:
+            batch = list(self.filter(pk__gt=last_pk,
+                                     attempts__lt=max_attempts).
+                              order_by('pk')[:batch_size])
+            if not batch:
+                break
+            done = []
+            alive = set(ImageBlob.objects.filter(
+                                name__in=[item.name for item in batch],
+                                ref_count__gt=0).values_list('name', flat=True))
+            for item in batch:
+                if item.name in alive:
+                    done.append(item.pk)
+                    continue
+                try:
+                    item.get_storage().delete(item.name)
+                    done.append(item.pk)
+                except Exception:
+                    failed += 1
+                    self.filter(pk=item.pk).update(attempts=F('attempts')+1,
+                                                   last_error=force_unicode(sys.exc_info()[1]))
+            self.filter(pk__in=done).delete()
+            deleted += len(done)
+            last_pk = batch[-1].pk
+        return deleted, failed
+
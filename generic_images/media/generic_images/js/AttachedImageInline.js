@@ -1,97 +1,234 @@
-(function($){  //$-safe plugin
+/*
+ * Resumable chunked multi-image uploader for AttachedImagesInline.
+ *
+ * Each selected file gets an upload session on the server; chunks of all
+ * files are sent by several parallel PUT requests. Session keys are kept
+ * in localStorage so an interrupted upload (closed tab, lost connection)
+ * continues with the chunks that were not received yet when the same
+ * files are selected again. When all chunks are received sessions are
+ * completed by one request and the page is reloaded.
+ */
+(function(){
+
+var PARALLEL_REQUESTS = 4;
+
+function request(method, url, body, callback){
+    var xhr = new XMLHttpRequest();
+    xhr.open(method, url, true);
+    if (typeof body == 'string')
+        xhr.setRequestHeader('Content-Type', 'application/x-www-form-urlencoded');
+    xhr.onreadystatechange = function(){
+        if (xhr.readyState != 4)
+            return;
+        var data = null;
+        try { data = JSON.parse(xhr.responseText); } catch (e) {}
+        callback(xhr.status, data);
+    };
+    xhr.send(body);
+}
+
+function encode(params){
+    var parts = [];
+    for (var i = 0; i < params.length; i++)
+        parts.push(encodeURIComponent(params[i][0]) + '=' +
+                   encodeURIComponent(params[i][1]));
+    return parts.join('&');
+}
+
+function storage(){
+    try { return window.localStorage || null; } catch (e) { return null; }
+}
+
+function ChunkedUploader(element){
+    this.element = element;
+    this.startUrl = element.getAttribute('data-start-url');
+    this.completeUrl = element.getAttribute('data-complete-url');
+    this.status = document.getElementById('upload-status');
+    this.bar = document.getElementById('progress-bar-percentage-id');
+    this.files = [];
+    this.queue = [];
+    this.active = 0;
+    this.failed = false;
+}
+
+ChunkedUploader.prototype = {
+
+    message: function(name){
+        return this.element.getAttribute('data-msg-' + name);
+    },
 
-var AttachedImagesAdminUploader = new Class({
-    Extends: DjangoImageUploader,
+    csrfToken: function(){
+        var input = document.getElementsByName('csrfmiddlewaretoken')[0];
+        return input ? input.value : null;
+    },
 
-    options: {
-        formsetPrefix: 'generic_images-attachedimage-content_type-object_id',
-        user: '',
-        previewWidth: 200
+    post: function(url, params, callback){
+        var token = this.csrfToken();
+        if (token)
+            params.push(['csrfmiddlewaretoken', token]);
+        request('POST', url, encode(params), callback);
     },
 
-    isFormsetField: function(name){
-        var pref = this.options.formsetPrefix;
-        return name.substring(0, pref.length) == pref;
+    fileId: function(file){
+        return ['generic_images', this.startUrl, file.name, file.size,
+                file.lastModified || ''].join('|');
     },
 
-    cleanupFields: function(fields){
-        var cleanedFields = {};
-        var self = this;
-        var denied_names = ['_save', '_addanother', '_continue'];
-        $each(fields, function(value, name){
-            if (name && !(name in denied_names) && !self.isFormsetField(name))
-                cleanedFields[name]=value;
-        });
-        return cleanedFields;
+    upload: function(fileList){
+        this.files = [];
+        this.failed = false;
+        for (var i = 0; i < fileList.length; i++)
+            this.files.push({file: fileList[i], session: null, sent: 0});
+        this.showStatus(this.message('starting'));
+        for (var i = 0; i < this.files.length; i++)
+            this.startSession(this.files[i]);
     },
 
-    getNewFormsetFields: function(){
-        var fields = {};
-        var prefix = this.options.formsetPrefix+'-';
-        for (var i = 0; i < this.files.length; i++) {
-            fields[prefix + i + '-id'] = '';
-            fields[prefix + i + '-caption'] = '';
-            fields[prefix + i + '-order'] = '0';
-            fields[prefix + i + '-user'] = this.options.user;
+    startSession: function(item){
+        var self = this;
+        var store = storage();
+        var url = store && store.getItem(this.fileId(item.file));
+        if (url) { // resume
+            request('GET', url, null, function(status, data){
+                if (status == 200)
+                    self.sessionReady(item, data);
+                else
+                    self.createSession(item);
+            });
+        } else {
+            this.createSession(item);
         }
-        return fields;
     },
 
-    getFormFields: function(){
-        if (this.options.formElement == null)
-            this.options.formElement = $$('form')[0];
-
-        var existing = this.cleanupFields(this.getExistingFormFields());
-        var management = this.getManagementFields();
-        var generated = this.getNewFormsetFields();
-
-        return $merge(existing, management, generated);
-    }
+    createSession: function(item){
+        var self = this;
+        this.post(this.startUrl, [['name', item.file.name], ['size', item.file.size]],
+            function(status, data){
+                if (status != 200)
+                    return self.fail(item, data);
+                var store = storage();
+                if (store)
+                    store.setItem(self.fileId(item.file), data.url);
+                self.sessionReady(item, data);
+            });
+    },
 
-});
+    sessionReady: function(item, session){
+        item.session = session;
+        var received = {};
+        for (var i = 0; i < session.received.length; i++)
+            received[session.received[i]] = true;
+        item.sent = session.received_size;
+        for (var index = 0; index < session.chunks; index++)
+            if (!received[index])
+                this.queue.push([item, index]);
+        this.next();
+    },
 
-window.addEvent('domready', function(){
+    next: function(){
+        if (this.failed)
+            return;
+        while (this.active < PARALLEL_REQUESTS && this.queue.length)
+            this.sendChunk.apply(this, this.queue.shift());
+        this.showProgress();
+        if (!this.active && !this.queue.length && this.allStarted())
+            this.complete();
+    },
 
-    if (!window.google || !google.gears)
-        return;
+    allStarted: function(){
+        for (var i = 0; i < this.files.length; i++)
+            if (!this.files[i].session)
+                return false;
+        return true;
+    },
 
-    if (google.gears.factory.version < '0.5.21')
-        return;
+    sendChunk: function(item, index){
+        var self = this;
+        var session = item.session;
+        var start = index * session.chunk_size;
+        var end = Math.min(start + session.chunk_size, session.size);
+        var slice = item.file.slice || item.file.webkitSlice || item.file.mozSlice;
+        this.active++;
+        request('PUT', session.url + index + '/', slice.call(item.file, start, end),
+            function(status, data){
+                self.active--;
+                if (status != 200)
+                    return self.fail(item, data);
+                item.sent += end - start;
+                self.next();
+            });
+    },
 
-    if ($('gears-uploader'))
-    {
-        var pb = new ProgressBar({
-            container:'progress-bar',
-            displayText: true,
-            speed: 100
+    complete: function(){
+        var self = this;
+        var params = [];
+        for (var i = 0; i < this.files.length; i++)
+            params.push(['key', this.files[i].session.key]);
+        this.showStatus(this.message('processing'));
+        this.post(this.completeUrl, params, function(status, data){
+            // sessions are kept by server (and can be resumed) if request
+            // failed or file was not uploaded completely
+            if (status != 200)
+                return self.fail(null, data);
+            var store = storage();
+            var errors = [];
+            for (var i = 0; i < self.files.length; i++) {
+                var item = self.files[i];
+                var error = data.errors[item.session.key];
+                if (store && error != 'incomplete')
+                    store.removeItem(self.fileId(item.file));
+                if (error)
+                    errors.push(item.file.name + ': ' + self.message(error));
+            }
+            if (errors.length)
+                alert(errors.join('\n'));
+            setTimeout(function(){ window.location.reload(); }, 0);
         });
+    },
 
-        function getMaxWidth()
-        {
-            if ($('gears-resize-needed').checked)
-                return $('gears-resize-width').value;
-            return null;
-        }
+    fail: function(item, data){
+        this.failed = true;
+        var text = this.message('failed');
+        if (item)
+            text += ' ' + item.file.name;
+        if (data && data.error)
+            text += ': ' + data.error;
+        this.showStatus(text);
+    },
 
-        var uploader = new AttachedImagesAdminUploader({
-            statusElement: 'upload-status',
-            previewsElement: 'thumbs',
-            fileElementName: 'image',
-            progressBar: pb,
-            user: $('request-user-id').get('text'),
-            maxWidth: getMaxWidth(),
-
-            onUploadComplete: function(){
-                setTimeout(function(){window.location.reload();},0);
-            },
-            onBeforeProcess: function(){
-                this.options.maxWidth = getMaxWidth();
-            }
-        });
+    showProgress: function(){
+        var total = 0, sent = 0;
+        for (var i = 0; i < this.files.length; i++) {
+            total += this.files[i].file.size;
+            sent += this.files[i].sent;
+        }
+        var percent = total ? Math.round(100 * sent / total) : 0;
+        this.bar.style.width = percent + '%';
+        document.getElementById('progress-bar').style.display = 'block';
+        this.showStatus(percent + '%');
+    },
 
-        $('gears-uploader').show();
-        $('gears-please-install').hide();
+    showStatus: function(text){
+        this.status.innerHTML = '';
+        this.status.appendChild(document.createTextNode(text));
     }
-});
+};
 
-})(document.id); // end $-safe plugin
+function init(){
+    var element = document.getElementById('chunked-uploader');
+    if (!element || !window.XMLHttpRequest || !window.File || !window.JSON)
+        return;
+    var uploader = new ChunkedUploader(element);
+    document.getElementById('upload-handler').onclick = function(){
+        var files = document.getElementById('select-handler').files;
+        if (files.length)
+            uploader.upload(files);
+        return false;
+    };
+    element.style.display = 'block';
+}
+
+if (window.addEventListener)
+    window.addEventListener('load', init, false);
+
+})();
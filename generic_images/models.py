@@ -1,16 +1,56 @@
 #coding: utf-8
 import os
-#import random
 
-from django.db import models
+from django.db import models, connection
+from django.db.models.fields.files import ImageFieldFile
+from django.conf import settings
+from django.db.models import Q
 from django.contrib.auth.models import User
-from django.core.files.storage import default_storage
-from django.db.models import Max
+from django.contrib.contenttypes.models import ContentType
 from django.utils.translation import ugettext_lazy as _
 
-from generic_images.signals import image_saved, image_deleted
-from generic_images.managers import AttachedImageManager
+from generic_images.signals import image_saved, image_deleted, images_attached, \
+                                   image_replaced
+from generic_images.managers import AttachedImageManager, ImageSequenceManager, \
+                                    PendingFileDeletionManager, ImageBlobManager, \
+                                    UploadSessionManager
+from generic_images import cache as image_cache
+from generic_images.context_processors import THUMB_TYPES
+from generic_images.image_info import read_image_info
+from generic_images.allocators import MaxOrderAllocator, UUIDFileNamer
 from generic_utils.models import GenericModelBase
+from generic_utils.managers import RelatedInjector
+from generic_utils.db import supports_window_functions, \
+                             commit_on_success_unless_managed
+from generic_utils.contenttypes import resolver
+from generic_utils.instrumentation import instrumented
+
+
+BLOB_DIR = os.path.join('media', 'images', 'blobs')
+UPLOADS_DIR = os.path.join('media', 'uploads')
+
+
+class _ReceivingImageFieldFile(ImageFieldFile):
+    ''' Passes new file content to the model before the file is named
+        (``upload_to`` is called) and stored. The model can store the file
+        itself. '''
+
+    def save(self, name, content, save=True):
+        stored_name = self.instance._file_received(name, content)
+        if stored_name is None:
+            super(_ReceivingImageFieldFile, self).save(name, content, save)
+            return
+        self.name = stored_name
+        setattr(self.instance, self.field.name, self.name)
+        self._size = len(content)
+        self._committed = True
+        if save:
+            self.instance.save()
+    save.alters_data = True
+
+
+class _ReceivingImageField(models.ImageField):
+    attr_class = _ReceivingImageFieldFile
 
 
 class BaseImageModel(models.Model):
@@ -28,7 +68,13 @@ class BaseImageModel(models.Model):
     def _upload_path_wrapper(self, filename):
         return self.get_upload_path(filename)
 
-    image = models.ImageField(_('Image'), upload_to=_upload_path_wrapper)
+    def _file_received(self, name, content):
+        ''' Called with name and content of new file before
+            :meth:`get_upload_path` is called for it. Returns name of the
+            stored file if the file was stored here or None if it should
+            be stored the usual way. '''
+
+    image = _ReceivingImageField(_('Image'), upload_to=_upload_path_wrapper)
 
     class Meta:
         abstract = True
@@ -38,31 +84,115 @@ class BaseImageModel(models.Model):
 class ReplaceOldImageModel(BaseImageModel):
     '''
         Abstract Model class with image field.
-        If the file for image is re-uploaded, old file is deleted.
+        If the file for image is re-uploaded or the instance is deleted,
+        old file is deleted.
+        Name of the loaded file is remembered when instance is created so
+        no additional queries are needed to detect re-uploads.
+
+        Files are not deleted during the request: they are put into
+        :class:`~generic_images.models.PendingFileDeletion` queue in the
+        same transaction and are deleted by ``cleanup_image_files``
+        management command through the field's storage.
     '''
 
+    def __init__(self, *args, **kwargs):
+        super(ReplaceOldImageModel, self).__init__(*args, **kwargs)
+        self._loaded_image_name = self._get_stored_image_name()
+
+    def _get_stored_image_name(self):
+        # Value from database is a string; files assigned to new instances
+        # are not stored yet. 'image' is absent if the field is deferred.
+        if 'image' not in self.__dict__:
+            return None
+        value = self.__dict__['image']
+        if isinstance(value, basestring):
+            return value
+        return getattr(value, 'name', '') if getattr(value, '_committed', False) else ''
+
     def _replace_old_image(self):
         ''' Override this in subclass if you don't want
-            image replacing or want to customize image replacing
+            image replacing or want to customize image replacing.
+            It is called after the instance is saved if image file was
+            changed; old file name is in ``self._loaded_image_name``.
         '''
-        try:
-            old_obj = self.__class__.objects.get(pk=self.pk)
-            if old_obj.image.path != self.image.path:
-                path = old_obj.image.path
-                default_storage.delete(path)
-        except self.__class__.DoesNotExist:
-            pass
+        self._release_file(self._loaded_image_name)
+
+    def _release_file(self, name):
+        ''' Queues file ``name`` that is not used by this instance anymore
+            for deletion. '''
+        PendingFileDeletion.objects.enqueue(self, name)
 
     def save(self, *args, **kwargs):
-        if self.pk:
-            self._replace_old_image()
+        old_name = self._loaded_image_name
+        if old_name is None and self.pk and 'image' in self.__dict__:
+            # deferred image field was assigned
+            old_name = self.__class__._default_manager.filter(pk=self.pk).\
+                                    values_list('image', flat=True)[0]
+
         super(ReplaceOldImageModel, self).save(*args, **kwargs)
 
+        if old_name and old_name != self.image.name:
+            self._loaded_image_name = old_name
+            self._replace_old_image()
+            image_replaced.send(sender=self.__class__, instance=self,
+                                old_name=old_name)
+        self._loaded_image_name = self._get_stored_image_name()
+
+    def delete(self, *args, **kwargs):
+        name = self.image.name
+        super(ReplaceOldImageModel, self).delete(*args, **kwargs)
+        self._release_file(name)
+
     class Meta:
         abstract = True
 
 
 
+class AlbumPosition(object):
+    ''' Position of image among images attached to the same object.
+        Returned by
+        :meth:`~generic_images.models.AbstractAttachedImage.get_album_position`.
+
+        .. attribute:: previous_id, next_id
+
+            ids of previous and next images (None for the first/last image).
+            ``previous`` and ``next`` attributes fetch the images themselves.
+
+        .. attribute:: position
+
+            Image order number (starting from 1).
+
+        .. attribute:: total
+
+            Number of images attached to the object.
+    '''
+
+    def __init__(self, model, previous_id, next_id, position, total):
+        self.model = model
+        self.previous_id = previous_id
+        self.next_id = next_id
+        self.position = position
+        self.total = total
+
+    def _get_image(self, pk):
+        if pk is None:
+            return None
+        return self.model.objects.get(pk=pk)
+
+    @property
+    def previous(self):
+        if not hasattr(self, '_previous'):
+            self._previous = self._get_image(self.previous_id)
+        return self._previous
+
+    @property
+    def next(self):
+        if not hasattr(self, '_next'):
+            self._next = self._get_image(self.next_id)
+        return self._next
+
+
+
 class AbstractAttachedImage(ReplaceOldImageModel, GenericModelBase):
     '''
         Abstract Image model that can be attached to any other Django model
@@ -71,14 +201,32 @@ class AbstractAttachedImage(ReplaceOldImageModel, GenericModelBase):
         .. attribute:: is_main
 
             BooleanField. Whether the image is the main image for object.
-            This field is set to False automatically for all images attached to
-            same object if image with is_main=True is saved to ensure that there
-            is only 1 main image for object.
+            When image becomes main, previous main image of the same object
+            is unset in the same transaction to ensure that there is only 1
+            main image for object (see also
+            :meth:`~generic_images.managers.AttachedImageManager.set_main`).
+            On PostgreSQL and SQLite this is also enforced by partial unique
+            index created by ``syncdb``.
 
         .. attribute:: order
 
             IntegerField to support ordered image sets.
-            On creation it is set to max(id)+1.
+            On creation it is set by
+            :attr:`~generic_images.models.AbstractAttachedImage.order_allocator`
+            (max(order)+1 for images attached to the same object by default).
+
+        .. attribute:: width, height, file_size, format, content_hash
+
+            Image metadata (dimensions in pixels, file size in bytes, PIL
+            format name and sha1 hex digest of file content). It is filled
+            when file is uploaded so image files don't have to be opened
+            for getting dimensions (unlike ``image.width``)::
+
+                <img src="{{ image.image.url }}" width="{{ image.width }}"
+                     height="{{ image.height }}">
+
+            Use ``backfill_image_info`` management command to fill it for
+            images uploaded before these fields were added.
 
     '''
 
@@ -95,30 +243,55 @@ class AbstractAttachedImage(ReplaceOldImageModel, GenericModelBase):
 
     order = models.IntegerField(_('Order'), default=0)
 
+    width = models.PositiveIntegerField(_('Width'), null=True, editable=False)
+    height = models.PositiveIntegerField(_('Height'), null=True, editable=False)
+    file_size = models.PositiveIntegerField(_('File size'), null=True,
+                                            editable=False)
+    format = models.CharField(_('Format'), max_length=10, blank=True,
+                              editable=False)
+    content_hash = models.CharField(_('Content hash'), max_length=40,
+                                    blank=True, editable=False, db_index=True)
+
+    composite_indexes = [('content_type', 'object_id', 'order'),
+                         ('content_type', 'object_id', 'is_main')]
+    ''' Indexes for listing images of an object in order
+    (:meth:`~generic_utils.managers.GenericModelManager.for_model`,
+    :meth:`next`, :meth:`previous`, injectors) and for getting main image
+    (:meth:`~generic_images.managers.AttachedImageManager.get_main_for`).
+    They are created by ``syncdb``, see
+    :func:`~generic_utils.db.composite_index_sql`. '''
+
     objects = AttachedImageManager()
     '''Default manager of :class:`~generic_images.managers.AttachedImageManager`
     type.'''
 
+    def _siblings(self):
+        ''' Images attached to the same object. content_object is not
+            fetched. '''
+        return self.__class__.objects.filter(content_type=self.content_type_id,
+                                             object_id=self.object_id)
+
+    @instrumented('AttachedImage.next')
     def next(self):
         ''' Returns next image for same content_object and None if image is
         the last. '''
         try:
-            return self.__class__.objects.for_model(self.content_object,
-                                                    self.content_type).\
-                            filter(order__lt=self.order).order_by('-order')[0]
+            return self._siblings().filter(order__lt=self.order).\
+                                    order_by('-order')[0]
         except IndexError:
             return None
 
+    @instrumented('AttachedImage.previous')
     def previous(self):
         ''' Returns previous image for same content_object and None if image
         is the first. '''
         try:
-            return self.__class__.objects.for_model(self.content_object,
-                                                    self.content_type).\
-                            filter(order__gt=self.order).order_by('order')[0]
+            return self._siblings().filter(order__gt=self.order).\
+                                    order_by('order')[0]
         except IndexError:
             return None
 
+    @instrumented('AttachedImage.get_order_in_album')
     def get_order_in_album(self, reversed_ordering=True):
         ''' Returns image order number. It is calculated as (number+1) of images
         attached to the same content_object whose order is greater
@@ -126,39 +299,157 @@ class AbstractAttachedImage(ReplaceOldImageModel, GenericModelBase):
         False) than image's order.
         '''
         lookup = 'order__gt' if reversed_ordering else 'order__lt'
-        return self.__class__.objects.\
-                        for_model(self.content_object, self.content_type).\
-                        filter(**{lookup: self.order}).count() + 1
-
-
-    def _get_next_pk(self):
-        max_pk = self.__class__.objects.aggregate(m=Max('pk'))['m'] or 0
-        return max_pk+1
-
-
-#    def put_as_last(self):
-#        """ Sets order to max(order)+1 for self.content_object
-#        """
-#        last = self.__class__.objects.exclude(id=self.id).\
-#                        filter(
-#                           object_id = self.object_id,
-#                           content_type = self.content_type,
-#                        ).aggregate(max_order=Max('order'))['max_order'] or 0
-#        self.order = last+1
-
+        return self._siblings().filter(**{lookup: self.order}).count() + 1
+
+    @instrumented('AttachedImage.get_album_position')
+    def get_album_position(self, reversed_ordering=True):
+        ''' Returns :class:`~generic_images.models.AlbumPosition` with
+        previous and next image ids, image order number and total number of
+        images attached to the same content_object. Images with equal
+        ``order`` are ordered by id.
+
+        It takes 1 SQL query if database supports window functions and 4
+        simple queries otherwise (instead of separate
+        :meth:`next`, :meth:`previous` and :meth:`get_order_in_album` calls).
+        '''
+        if supports_window_functions():
+            previous_id, next_id, position, total = self._album_position_sql()
+        else:
+            previous_id, next_id, position, total = self._album_position_orm()
+        if not reversed_ordering:
+            position = total - position + 1
+        return AlbumPosition(self.__class__, previous_id, next_id, position,
+                             total)
+
+    def _album_position_sql(self):
+        qn = connection.ops.quote_name
+        opts = self._meta
+        window = "OVER (ORDER BY %s DESC, %s DESC)" % (
+                    qn(opts.get_field('order').column), qn(opts.pk.column))
+        sql = """
+            SELECT prev_id, next_id, position, total FROM (
+                SELECT %(pk)s AS image_id,
+                       LAG(%(pk)s) %(window)s AS prev_id,
+                       LEAD(%(pk)s) %(window)s AS next_id,
+                       ROW_NUMBER() %(window)s AS position,
+                       COUNT(*) OVER () AS total
+                FROM %(table)s
+                WHERE %(ct)s = %%s AND %(fk)s = %%s
+            ) positions WHERE image_id = %%s
+        """ % dict(pk=qn(opts.pk.column), window=window,
+                   table=qn(opts.db_table),
+                   ct=qn(opts.get_field('content_type').column),
+                   fk=qn(opts.get_field('object_id').column))
+        cursor = connection.cursor()
+        cursor.execute(sql, [self.content_type_id, self.object_id, self.pk])
+        return cursor.fetchone()
+
+    def _album_position_orm(self):
+        siblings = self._siblings().order_by()
+        before = siblings.filter(Q(order__gt=self.order) |
+                                 Q(order=self.order, pk__gt=self.pk))
+        after = siblings.filter(Q(order__lt=self.order) |
+                                Q(order=self.order, pk__lt=self.pk))
+        previous_ids = before.order_by('order', 'pk').values_list('pk', flat=True)[:1]
+        next_ids = after.order_by('-order', '-pk').values_list('pk', flat=True)[:1]
+        return (previous_ids and previous_ids[0] or None,
+                next_ids and next_ids[0] or None,
+                before.count() + 1, siblings.count())
+
+
+    order_allocator = MaxOrderAllocator()
+    ''' Strategy for setting ``order`` of new images, see
+    :mod:`generic_images.allocators`. '''
+
+    file_namer = UUIDFileNamer()
+    ''' Strategy for naming uploaded files, see
+    :mod:`generic_images.allocators`. '''
+
+    deduplicate = getattr(settings, 'GENERIC_IMAGES_DEDUPLICATE', False)
+    ''' If True, uploaded files are stored by content hash
+    (:file:`media/images/blobs/<hash[:2]>/<hash>.<ext>`) and identical
+    uploads share one file. Shared files are reference-counted by
+    :class:`~generic_images.models.ImageBlob` and are deleted when the last
+    image using them is deleted or re-uploaded. ``GENERIC_IMAGES_DEDUPLICATE``
+    setting is the default value. '''
 
     def get_file_name(self, filename):
         ''' Returns file name (without path and extenstion)
-            for uploaded image. Default is 'max(pk)+1'.
+            for uploaded image. Default is a random string returned by
+            :attr:`~generic_images.models.AbstractAttachedImage.file_namer`.
             Override this in subclass or assign another functions per-instance
-            if you want different file names (ex: random string).
+            if you want different file names.
+        '''
+        return self.file_namer.get_file_name(self, filename)
+
+
+    def update_image_info(self, content=None, with_hash=True):
+        ''' Fills image metadata fields (see
+            :func:`~generic_images.image_info.read_image_info`) from
+            ``content`` file. New uploaded file or stored file is read if
+            ``content`` is not given. Instance is not saved.
+            It is called automatically for each new file before the file
+            is stored.
+        '''
+        if content is None and self.image._committed:
+            content = self.image.storage.open(self.image.name)
+            try:
+                info = read_image_info(content, with_hash)
+            finally:
+                content.close()
+        else:
+            content = content or self.image.file
+            # collected by StreamingImageUploadHandler while uploading
+            # (content can be FieldFile wrapping the uploaded file)
+            info = getattr(content, 'image_info', None) or \
+                   getattr(getattr(content, 'file', None), 'image_info', None) or \
+                   read_image_info(content, with_hash)
+        for name, value in info.items():
+            setattr(self, name, value)
+        self.format = self.format or ''
+        self.content_hash = self.content_hash or ''
+        self._info_content = content
+
+    def _file_received(self, name, content):
+        # Metadata is recorded and files are deduplicated whenever a file
+        # is stored, whatever path stored it (``image.save(name, content)``,
+        # assigned file, store_file); file namers (HashFileNamer) use
+        # content_hash.
+        if self._info_content is not content:
+            self.update_image_info(content)
+        if self.deduplicate:
+            return self._store_blob(name, content)
+
+
+    def store_file(self, content):
+        ''' Saves uploaded file ``content`` to the storage and assigns it to
+            the image field, the same way as ``image.save(content.name,
+            content, save=False)`` does. Instance is not saved.
+            If :attr:`~generic_images.models.AbstractAttachedImage.deduplicate`
+            is True file is named by content hash and reference to the
+            shared file is added when the row is saved, in the same
+            transaction.
         '''
-#        alphabet = "1234567890abcdefghijklmnopqrstuvwxyz"
-#        # 1e25 variants
-#        return ''.join([random.choice(alphabet) for i in xrange(16)])
+        self.image.save(content.name, content, save=False)
 
-        # anyway _get_next_pk is needed for setting `order` field
-        return str(self._get_next_pk())
+    def _store_blob(self, filename, content):
+        root, ext = os.path.splitext(filename)
+        name = os.path.join(BLOB_DIR, self.content_hash[:2],
+                            self.content_hash + ext.lower())
+        storage = self.image.storage
+        if not storage.exists(name):
+            saved = storage.save(name, content)
+            if saved != name: # the same content was saved concurrently
+                storage.delete(saved)
+        # re-upload of the same content keeps the reference it already has
+        self._blob_name = name if name != self._loaded_image_name else None
+        return name
+
+    def _release_file(self, name):
+        if name and name.startswith(BLOB_DIR) and \
+                not ImageBlob.objects.release(name):
+            return # file is still used by other images
+        super(AbstractAttachedImage, self)._release_file(name)
 
 
     def get_upload_path(self, filename):
@@ -169,8 +460,7 @@ class AbstractAttachedImage(ReplaceOldImageModel, GenericModelBase):
 
             ``<filename>`` is returned by
             :meth:`~generic_images.models.AbstractAttachedImage.get_file_name`
-            method. By default it is probable id of new image (it is
-            predicted as it is unknown at this stage).
+            method.
         '''
         user_folder = str(self.user.pk) if self.user else 'common'
 
@@ -179,31 +469,57 @@ class AbstractAttachedImage(ReplaceOldImageModel, GenericModelBase):
                             self.get_file_name(filename) + ext)
 
 
+    def __init__(self, *args, **kwargs):
+        super(AbstractAttachedImage, self).__init__(*args, **kwargs)
+        self._blob_name = None # blob that needs reference, see store_file
+        self._info_content = None # file update_image_info was called for
+
+    @instrumented('AttachedImage.save')
     def save(self, *args, **kwargs):
         send_signal = getattr(self, 'send_signal', True)
-        if self.is_main:
-            related_images = self.__class__.objects.filter(
-                                                content_type=self.content_type,
-                                                object_id=self.object_id
-                                            )
-            related_images.update(is_main=False)
+        if self.deduplicate and self.image and not self.image._committed:
+            # stored before the row is saved so blob reference is added in
+            # the same transaction
+            self.store_file(self.image.file)
 
-        if not self.pk: # object is created
+        created = not self.pk
+        if created:
             if not self.order: # order is not set
-                self.order = self._get_next_pk() # let it be max(pk)+1
+                self.order = self.order_allocator.allocate(self)
 
-        super(AbstractAttachedImage, self).save(*args, **kwargs)
+        self._save_row(*args, **kwargs)
+        self._blob_name = None
+        image_cache.invalidate_for(self.content_type_id, self.object_id)
 
+        # image count fields don't get signal kwargs so pass it this way
+        self._image_created = created
         if send_signal:
-            image_saved.send(sender = self.content_type.model_class(),
-                             instance = self)
+            image_saved.send(sender = resolver.get_model(self.content_type_id),
+                             instance = self, created = created)
+
+
+    @commit_on_success_unless_managed
+    def _save_row(self, *args, **kwargs):
+        if self._blob_name:
+            ImageBlob.objects.acquire(self._blob_name)
+        # Other main images are unset even if this image was loaded as
+        # main: set_main could have been called for another image since.
+        # The UPDATE only touches rows with is_main=True. Partial unique
+        # index (see sql/attachedimage.*.sql) guarantees that concurrent
+        # saves can't leave two main images.
+        if self.is_main:
+            self.__class__.objects._unset_main(self.content_type_id,
+                                               self.object_id, self.pk)
+        super(AbstractAttachedImage, self).save(*args, **kwargs)
 
 
+    @instrumented('AttachedImage.delete')
     def delete(self, *args, **kwargs):
         send_signal = getattr(self, 'send_signal', True)
         super(AbstractAttachedImage, self).delete(*args, **kwargs)
+        image_cache.invalidate_for(self.content_type_id, self.object_id)
         if send_signal:
-            image_deleted.send(sender = self.content_type.model_class(),
+            image_deleted.send(sender = resolver.get_model(self.content_type_id),
                                instance = self)
 
 
@@ -231,6 +547,224 @@ class AttachedImage(AbstractAttachedImage):
         Image model that can be attached to any other Django model using
         generic relations. It is simply non-abstract subclass of
         :class:`~generic_images.models.AbstractAttachedImage`
+        with support for renditions (:mod:`generic_images.renditions`).
     '''
+
+    def get_renditions(self):
+        ''' Returns dict with :class:`~generic_images.models.ImageRendition`
+            instances for all ``THUMBNAIL_TYPES``. Missing renditions are
+            created. '''
+        from generic_images.renditions import get_renditions
+        return get_renditions(self)
+
+    def get_rendition(self, thumbnail_type):
+        ''' Returns :class:`~generic_images.models.ImageRendition` for
+            ``thumbnail_type``. It is created if it doesn't exist. '''
+        from generic_images.renditions import get_rendition
+        return get_rendition(self, thumbnail_type)
+
     class Meta:
         ordering = ['-order']
+
+
+class ImageSequence(models.Model):
+    '''
+        Counter table used by
+        :class:`~generic_images.allocators.SequenceAllocator`.
+    '''
+    name = models.CharField(max_length=255, unique=True)
+    value = models.IntegerField(default=0)
+
+    objects = ImageSequenceManager()
+
+    def __unicode__(self):
+        return u"%s=%d" % (self.name, self.value)
+
+
+class ImageBlob(models.Model):
+    '''
+        Reference counter of image file shared by images with the same
+        content (see
+        :attr:`~generic_images.models.AbstractAttachedImage.deduplicate`).
+    '''
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.IntegerField(default=0)
+
+    objects = ImageBlobManager()
+
+    def __unicode__(self):
+        return u"%s (%d)" % (self.name, self.ref_count)
+
+
+class UploadSession(models.Model):
+    '''
+        File being uploaded in chunks by resumable uploader (see
+        :mod:`generic_images.uploads`). Chunks are stored as separate files
+        by the storage of :class:`~generic_images.models.AttachedImage`
+        image field until the upload is completed.
+    '''
+    key = models.CharField(max_length=32, unique=True)
+    content_type = models.ForeignKey(ContentType)
+    object_id = models.PositiveIntegerField()
+    user = models.ForeignKey(User, blank=True, null=True)
+    file_name = models.CharField(max_length=255)
+    size = models.PositiveIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = UploadSessionManager()
+
+    @property
+    def chunk_count(self):
+        return (self.size + self.chunk_size - 1) // self.chunk_size
+
+    def get_chunk_size(self, index):
+        ''' Returns expected size of chunk ``index`` in bytes. '''
+        return min(self.chunk_size, self.size - index*self.chunk_size)
+
+    def get_chunk_name(self, index):
+        return os.path.join(UPLOADS_DIR, self.key, str(index))
+
+    def get_storage(self):
+        return AttachedImage._meta.get_field('image').storage
+
+    def discard(self):
+        ''' Deletes the session and queues its chunk files for deletion. '''
+        for index in self.chunks.values_list('index', flat=True):
+            PendingFileDeletion.objects.enqueue(AttachedImage,
+                                                self.get_chunk_name(index))
+        self.delete()
+
+    def __unicode__(self):
+        return self.file_name
+
+
+class UploadChunk(models.Model):
+    ''' Received chunk of :class:`~generic_images.models.UploadSession`. '''
+    session = models.ForeignKey(UploadSession, related_name='chunks')
+    index = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = (('session', 'index'),)
+
+
+class PendingFileDeletion(models.Model):
+    '''
+        Queue of files that should be deleted. Files are deleted by
+        ``cleanup_image_files`` management command (see
+        :meth:`~generic_images.managers.PendingFileDeletionManager.process`).
+    '''
+    content_type = models.ForeignKey(ContentType)
+    'Model of the field the file was stored by.'
+
+    field_name = models.CharField(max_length=100, default='image')
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    objects = PendingFileDeletionManager()
+
+    def get_storage(self):
+        model = resolver.get_model(self.content_type_id)
+        return model._meta.get_field(self.field_name).storage
+
+    def __unicode__(self):
+        return self.name
+
+
+class ImageRendition(models.Model):
+    '''
+        Resized copy of :class:`~generic_images.models.AttachedImage` for
+        one of ``THUMBNAIL_TYPES`` (see :mod:`generic_images.renditions`).
+        File is stored by the storage of original image field, its
+        dimensions are stored in the table so templates never have to open
+        image files.
+    '''
+    image = models.ForeignKey(AttachedImage, related_name='renditions')
+    thumbnail_type = models.CharField(max_length=50)
+
+    size = models.CharField(max_length=50)
+    'THUMBNAIL_TYPES value the rendition was created for, e.g. "130x130".'
+
+    source = models.CharField(max_length=255)
+    'Name of original image file the rendition was created from.'
+
+    name = models.CharField(max_length=255)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+
+    objects = models.Manager()
+    injector = RelatedInjector(fk_field='image')
+
+    class Meta:
+        unique_together = (('image', 'thumbnail_type'),)
+
+    def is_up_to_date(self, image):
+        ''' Whether the rendition matches current file of ``image`` and
+            current ``THUMBNAIL_TYPES`` value. '''
+        return self.source == image.image.name and \
+               self.size == THUMB_TYPES.get(self.thumbnail_type)
+
+    @property
+    def url(self):
+        return AttachedImage._meta.get_field('image').storage.url(self.name)
+
+    def __unicode__(self):
+        return self.name
+
+
+def _renditions_image_saved(sender, instance, created=False, **kwargs):
+    from generic_images import renditions
+    if renditions.EAGER and isinstance(instance, AttachedImage):
+        renditions.generate_renditions(instance)
+
+def _renditions_images_attached(sender, images, **kwargs):
+    from generic_images import renditions
+    if renditions.EAGER:
+        for image in images:
+            if isinstance(image, AttachedImage):
+                renditions.generate_renditions(image)
+
+def _renditions_image_replaced(sender, instance, **kwargs):
+    for rendition in instance.renditions.all():
+        rendition.delete()
+
+def _rendition_deleted(sender, instance, **kwargs):
+    PendingFileDeletion.objects.enqueue(AttachedImage, instance.name)
+
+image_saved.connect(_renditions_image_saved)
+images_attached.connect(_renditions_images_attached)
+image_replaced.connect(_renditions_image_replaced, sender=AttachedImage)
+models.signals.post_delete.connect(_rendition_deleted, sender=ImageRendition)
+
+
+def cascade_delete_images(model, image_model=None):
+    ''' Makes images attached to instances of ``model`` deleted when the
+        instance is deleted, the same way as
+        :meth:`~generic_images.managers.AttachedImageManager.delete_for`
+        does it (batched row deletion, files and renditions are queued for
+        deletion) but in the transaction of the object's delete. Without
+        it images of deleted objects are either left in the database or
+        are deleted by ``GenericRelation`` without removing their files. Call it in :file:`models.py` of your app::
+
+            from generic_images.models import cascade_delete_images
+
+            class Album(models.Model):
+                ...
+
+            cascade_delete_images(Album)
+
+        ``image_model`` is :class:`AttachedImage` by default.
+    '''
+    image_model = image_model or AttachedImage
+    def _delete_images(sender, instance, **kwargs):
+        # Images are deleted in the transaction of the object's delete
+        # (no nested commit) and the object is being deleted so there are
+        # no counts to update.
+        manager = image_model.objects
+        rows = manager._rows_to_delete(instance)
+        for start in range(0, len(rows), 500):
+            manager._delete_rows(rows[start:start+500])
+        manager._invalidate_cache(rows)
+    models.signals.pre_delete.connect(_delete_images, sender=model, weak=False)
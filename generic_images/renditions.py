@@ -0,0 +1,194 @@
+'''
+Server-side thumbnails ("renditions") of attached images for each of
+``THUMBNAIL_TYPES`` sizes (see :mod:`generic_images.context_processors`).
+
+Renditions are stored as :class:`~generic_images.models.ImageRendition`
+rows with file names and dimensions so templates don't need to open any
+image files::
+
+    {% for rendition in image.get_renditions.values %}
+        <img src="{{ rendition.url }}" width="{{ rendition.width }}"
+             height="{{ rendition.height }}">
+    {% endfor %}
+
+On list pages use :func:`prefetch_renditions` so renditions of all images
+are selected by one query instead of one query per image::
+
+    images = prefetch_renditions(list(AttachedImage.objects.for_model(album)))
+
+By default renditions are created lazily on first access
+(:func:`get_rendition`, :meth:`AttachedImage.get_renditions`). Set
+``GENERIC_IMAGES_EAGER_RENDITIONS = True`` to create them right after image
+is saved. Renditions are deleted when image file is re-uploaded and created
+again on next access.
+
+Images are resized preserving aspect ratio so that they fit into
+``WIDTHxHEIGHT`` box. ``GENERIC_IMAGES_RENDITION_QUALITY`` setting
+(default is 85) is JPEG quality of renditions.
+
+PIL is required.
+'''
+import os
+try:
+    from cStringIO import StringIO
+except ImportError:
+    from StringIO import StringIO
+
+try:
+    from PIL import Image
+except ImportError:
+    import Image
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from generic_images.context_processors import THUMB_TYPES
+from generic_images.models import AttachedImage, ImageRendition, PendingFileDeletion
+from generic_utils.instrumentation import instrumented
+
+EAGER = getattr(settings, 'GENERIC_IMAGES_EAGER_RENDITIONS', False)
+QUALITY = getattr(settings, 'GENERIC_IMAGES_RENDITION_QUALITY', 85)
+
+
+def parse_size(size):
+    ''' Returns (width, height) tuple for THUMBNAIL_TYPES value like
+        '130x130'. '''
+    width, height = size.lower().split('x')
+    return int(width), int(height)
+
+
+def resize(original, size, format=None):
+    ''' Returns (file content, width, height) of ``original`` (PIL image)
+        resized to fit into ``size`` box. '''
+    format = format or original.format or 'JPEG'
+    image = original.copy()
+    if image.mode not in ('RGB', 'RGBA', 'L', 'P'):
+        image = image.convert('RGB')
+    image.thumbnail(parse_size(size), Image.ANTIALIAS)
+    if format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    buf = StringIO()
+    image.save(buf, format, quality=QUALITY)
+    width, height = image.size
+    return buf.getvalue(), width, height
+
+
+def get_rendition_name(image_name, thumbnail_type):
+    root, ext = os.path.splitext(image_name)
+    return "%s.%s%s" % (root, thumbnail_type, ext)
+
+
+def render_files(image_name, sizes):
+    ''' Opens image file ``image_name`` (from AttachedImage storage),
+        decodes it once, saves resized copies for ``sizes`` (list of
+        (thumbnail type, size) tuples) and returns list of
+        (thumbnail type, size, file name, width, height) tuples.
+        It doesn't touch the database so it can be run in worker processes.
+    '''
+    storage = AttachedImage._meta.get_field('image').storage
+    source = storage.open(image_name)
+    try:
+        original = Image.open(source)
+        original.load()
+    finally:
+        source.close()
+
+    result = []
+    for thumbnail_type, size in sizes:
+        content, width, height = resize(original, size)
+        name = storage.save(get_rendition_name(image_name, thumbnail_type),
+                            ContentFile(content))
+        result.append((thumbnail_type, size, name, width, height))
+    return result
+
+
+def get_stale_types(image, existing, thumbnail_types=None, force=False):
+    ''' Returns thumbnail types (from ``thumbnail_types``, all
+        THUMBNAIL_TYPES by default) whose renditions are missing from
+        ``existing`` dict or are out of date. '''
+    thumbnail_types = thumbnail_types or THUMB_TYPES.keys()
+    return [thumbnail_type for thumbnail_type in thumbnail_types
+            if force or thumbnail_type not in existing or
+               not existing[thumbnail_type].is_up_to_date(image)]
+
+
+@instrumented('renditions.generate_renditions')
+def generate_renditions(image, thumbnail_types=None, force=False,
+                        existing=None):
+    ''' Creates renditions of ``image`` for ``thumbnail_types``
+        (all THUMBNAIL_TYPES by default). Up-to-date renditions are not
+        recreated unless ``force`` is True. Original image is decoded only
+        once. Returns dict with thumbnail types as keys and
+        :class:`~generic_images.models.ImageRendition` instances as values.
+    '''
+    thumbnail_types = thumbnail_types or THUMB_TYPES.keys()
+    if existing is None:
+        existing = dict((r.thumbnail_type, r) for r in image.renditions.all())
+
+    stale = get_stale_types(image, existing, thumbnail_types, force)
+    result = dict((thumbnail_type, existing[thumbnail_type])
+                  for thumbnail_type in thumbnail_types
+                  if thumbnail_type not in stale)
+    if not stale:
+        return result
+
+    sizes = [(thumbnail_type, THUMB_TYPES[thumbnail_type]) for thumbnail_type in stale]
+    for thumbnail_type, size, name, width, height in render_files(image.image.name, sizes):
+        result[thumbnail_type] = store_rendition(image, thumbnail_type, size,
+                                                 name, width, height,
+                                                 existing.get(thumbnail_type))
+    return result
+
+
+def store_rendition(image, thumbnail_type, size, name, width, height,
+                    rendition=None):
+    ''' Saves :class:`~generic_images.models.ImageRendition` row for newly
+        created rendition file. File of the old ``rendition`` (if any) is
+        queued for deletion. '''
+    if rendition is None:
+        rendition = ImageRendition(image=image, thumbnail_type=thumbnail_type)
+    elif rendition.name != name:
+        PendingFileDeletion.objects.enqueue(image, rendition.name)
+    rendition.size = size
+    rendition.source = image.image.name
+    rendition.name = name
+    rendition.width = width
+    rendition.height = height
+    rendition.save()
+    return rendition
+
+
+def prefetch_renditions(images):
+    ''' Selects existing renditions of all ``images`` (list of
+        :class:`~generic_images.models.AttachedImage` instances) using one
+        query (per ``RelatedInjector.chunk_size`` images), so
+        :func:`get_renditions` and :func:`get_rendition` don't query the
+        database for them. Returns ``images``. '''
+    ImageRendition.injector.inject_list_to(images, '_prefetched_renditions')
+    return images
+
+
+def _generate(image, thumbnail_types=None):
+    # Uses and updates renditions selected by prefetch_renditions, if any.
+    prefetched = getattr(image, '_prefetched_renditions', None)
+    if prefetched is None:
+        return generate_renditions(image, thumbnail_types)
+    existing = dict((r.thumbnail_type, r) for r in prefetched)
+    result = generate_renditions(image, thumbnail_types, existing=existing)
+    existing.update(result)
+    image._prefetched_renditions = existing.values()
+    return result
+
+
+def get_renditions(image):
+    ''' Returns dict with all renditions of ``image`` (by thumbnail
+        type). Missing renditions are created. Renditions selected by
+        :func:`prefetch_renditions` are used if available. '''
+    return _generate(image)
+
+
+def get_rendition(image, thumbnail_type):
+    ''' Returns rendition of ``image`` for ``thumbnail_type``.
+        It is created if it doesn't exist or is out of date. '''
+    return _generate(image, [thumbnail_type])[thumbnail_type]
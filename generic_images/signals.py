@@ -1,4 +1,8 @@
 import django.dispatch
 
-image_saved = django.dispatch.Signal(providing_args=["instance"])
-image_deleted = django.dispatch.Signal(providing_args=["instance"])
\ No newline at end of file
+image_saved = django.dispatch.Signal(providing_args=["instance", "created"])
+image_deleted = django.dispatch.Signal(providing_args=["instance"])
+images_attached = django.dispatch.Signal(providing_args=["content_object", "images"])
+image_replaced = django.dispatch.Signal(providing_args=["instance", "old_name"])
+images_reordered = django.dispatch.Signal(providing_args=["content_object", "images"])
+images_deleted = django.dispatch.Signal(providing_args=["content_object", "images"])
@@ -0,0 +1,4 @@
+-- At most one main image per object (SQLite 3.8.0+).
+CREATE UNIQUE INDEX generic_images_attachedimage_main
+    ON generic_images_attachedimage (content_type_id, object_id)
+    WHERE is_main = 1;
@@ -0,0 +1,623 @@
+from __future__ import with_statement
+
+import base64
+import os
+import sys
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.conf import settings
+from django.db import models, transaction, IntegrityError
+from django.http import Http404, HttpRequest
+from django.test import TestCase, TransactionTestCase
+
+from generic_images import cache as image_cache
+from generic_images.allocators import SequenceAllocator
+from generic_images.management.commands.regenerate_renditions import \
+    read_checkpoint, write_checkpoint
+from generic_images.managers import ImagesAndUserManager
+from generic_images.models import AbstractAttachedImage, AttachedImage, \
+                                  ImageBlob, ImageRendition, ImageSequence, \
+                                  PendingFileDeletion, BLOB_DIR
+from generic_utils.contenttypes import resolver
+from generic_utils.db import bulk_insert, supports_window_functions
+from generic_utils.pagination import InvalidCursor, decode_cursor, \
+                                     encode_cursor, get_page_or_404
+from generic_utils.test_helpers import assert_max_queries
+
+# 1x1 transparent GIF
+TINY_GIF = ('GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!'
+            '\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00'
+            '\x00\x02\x02D\x01\x00;')
+
+
+def gif_file(name='test.gif'):
+    content = ContentFile(TINY_GIF)
+    content.name = name
+    return content
+
+
+def delete_stored_files():
+    ''' Removes files stored by the test (image and blob files and files
+        queued for deletion). '''
+    storage = AttachedImage._meta.get_field('image').storage
+    names = set(AttachedImage.objects.values_list('image', flat=True))
+    names.update(ImageBlob.objects.values_list('name', flat=True))
+    names.update(PendingFileDeletion.objects.values_list('name', flat=True))
+    for name in names:
+        if name and storage.exists(name):
+            storage.delete(name)
+
+
+class Photo(AbstractAttachedImage):
+    ''' Image model other than AttachedImage (renditions don't refer to
+        it). '''
+
+
+try:
+    from generic_images.fields import ImageCountField, recalculate_all
+except ImportError: # django-composition is not installed
+    ImageCountField = None
+
+if ImageCountField is not None:
+    class CountedAlbum(models.Model):
+        image_count = ImageCountField()
+
+    class IncrementalAlbum(models.Model):
+        image_count = ImageCountField(incremental=True)
+
+
+def attach_images(obj, count, model=AttachedImage):
+    ''' Attaches ``count`` images to ``obj`` (the first one is main) and
+        returns them in album order. '''
+    content_type = resolver.get_for_model(obj)
+    bulk_insert(model, [model(content_type=content_type, object_id=obj.pk,
+                              order=order, is_main=(order == 1),
+                              image='test/%s-%d-%d.gif' % (
+                                    model._meta.module_name, obj.pk, order))
+                        for order in range(1, count + 1)])
+    return list(model.objects.for_model(obj))
+
+
+def add_renditions(images):
+    for image in images:
+        ImageRendition.objects.create(image=image, thumbnail_type='admin',
+                                      size='100x100', source=image.image.name,
+                                      name='test/r%d.gif' % image.pk,
+                                      width=1, height=1)
+
+
+class QueryBudgetTest(TestCase):
+    ''' Number of SQL queries of bulk operations must not depend on the
+        number of images or objects. '''
+
+    def setUp(self):
+        # content types are cached by resolver after the first lookup
+        resolver.get_for_model(User)
+        resolver.get_for_model(AttachedImage)
+        self.users = [User.objects.create(username='user%d' % i)
+                      for i in range(3)]
+        for user in self.users:
+            attach_images(user, 5)
+
+    def test_select_with_main_images(self):
+        manager = ImagesAndUserManager()
+        manager.model = User
+        with assert_max_queries(2):
+            users = list(manager.select_with_main_images(is_active=True))
+        self.assertEqual(len(users), 3)
+        for user in users:
+            self.assertEqual(user.main_image.order, 1)
+
+    def test_inject_list_to(self):
+        with assert_max_queries(1):
+            AttachedImage.injector.inject_list_to(self.users, 'images')
+        for user in self.users:
+            self.assertEqual(len(user.images), 5)
+
+    def test_reorder(self):
+        user = self.users[0]
+        ids = [image.pk for image in AttachedImage.objects.for_model(user)]
+        ids.reverse()
+        with assert_max_queries(2):
+            AttachedImage.objects.reorder(user, ids)
+        self.assertEqual([image.pk for image in AttachedImage.objects.for_model(user)],
+                         ids)
+
+    def test_delete_for(self):
+        user = self.users[0]
+        add_renditions(AttachedImage.objects.for_model(user))
+        # rows, renditions, 2 deletes, 2 queue inserts, signal objects
+        with assert_max_queries(7, storage_calls=0):
+            deleted = AttachedImage.objects.delete_for(user)
+        self.assertEqual(deleted, 5)
+        self.assertEqual(AttachedImage.objects.for_model(user).count(), 0)
+        self.assertEqual(ImageRendition.objects.count(), 0)
+        self.assertEqual(PendingFileDeletion.objects.count(), 10)
+
+    def test_budget_exceeded(self):
+        try:
+            with assert_max_queries(1):
+                list(User.objects.all())
+                list(AttachedImage.objects.all())
+        except AssertionError:
+            message = str(sys.exc_info()[1])
+        else:
+            self.fail("assert_max_queries didn't fail")
+        self.assertTrue(message.startswith("2 queries executed, 1 expected"))
+        self.assertTrue(User._meta.db_table in message)
+        self.assertTrue(AttachedImage._meta.db_table in message)
+
+
+class DeleteForTest(TestCase):
+
+    def test_other_image_model_keeps_renditions(self):
+        user = User.objects.create(username='user')
+        images = attach_images(user, 2)
+        add_renditions(images)
+        content_type = resolver.get_for_model(user)
+        # Photo rows get the same ids as AttachedImage rows with renditions
+        for image in images:
+            Photo(pk=image.pk, content_type=content_type, object_id=user.pk,
+                  order=image.order, image='test/photo%d.gif' % image.pk).\
+                save(force_insert=True)
+
+        self.assertEqual(Photo.objects.delete_for(user), 2)
+        self.assertEqual(Photo.objects.count(), 0)
+        self.assertEqual(AttachedImage.objects.count(), 2)
+        self.assertEqual(ImageRendition.objects.count(), 2)
+        self.assertEqual(sorted(PendingFileDeletion.objects.values_list('name', flat=True)),
+                         sorted(['test/photo%d.gif' % image.pk for image in images]))
+
+
+class TransactionTest(TransactionTestCase):
+    ''' Operations must join caller's managed transaction instead of
+        committing it. '''
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.images = attach_images(self.user, 3)
+
+    def run_rolled_back(self, func):
+        transaction.enter_transaction_management()
+        transaction.managed(True)
+        try:
+            User.objects.create(username='rolled back')
+            func()
+            transaction.rollback()
+        finally:
+            transaction.leave_transaction_management()
+        self.assertEqual(User.objects.filter(username='rolled back').count(), 0)
+
+    def test_reorder(self):
+        ids = [image.pk for image in self.images]
+        ids.reverse()
+        self.run_rolled_back(lambda: AttachedImage.objects.reorder(self.user, ids))
+        self.assertEqual([image.pk for image in AttachedImage.objects.for_model(self.user)],
+                         [image.pk for image in self.images])
+
+    def test_save_with_sequence_allocator(self):
+        def save():
+            image = AttachedImage(content_object=self.user, image='test/new.gif')
+            image.order_allocator = SequenceAllocator()
+            image.save()
+            self.assertEqual(image.order, 4)
+        self.run_rolled_back(save)
+        self.assertEqual(AttachedImage.objects.for_model(self.user).count(), 3)
+        self.assertEqual(ImageSequence.objects.count(), 0)
+
+
+class ImageBlobTest(TestCase):
+    name = os.path.join(BLOB_DIR, 'aa', 'aa.gif')
+
+    def tearDown(self):
+        delete_stored_files()
+
+    def test_acquire_release(self):
+        ImageBlob.objects.acquire(self.name)
+        ImageBlob.objects.acquire(self.name)
+        self.assertEqual(ImageBlob.objects.get(name=self.name).ref_count, 2)
+        self.assertFalse(ImageBlob.objects.release(self.name))
+        self.assertEqual(ImageBlob.objects.get(name=self.name).ref_count, 1)
+        self.assertTrue(ImageBlob.objects.release(self.name))
+        self.assertEqual(ImageBlob.objects.filter(name=self.name).count(), 0)
+        # files that are not blobs can always be deleted
+        self.assertTrue(ImageBlob.objects.release('media/images/common/a.gif'))
+
+    def test_release_many(self):
+        for i in range(3):
+            ImageBlob.objects.acquire(self.name)
+        self.assertFalse(ImageBlob.objects.release(self.name, 2))
+        self.assertTrue(ImageBlob.objects.release(self.name))
+
+    def test_field_file_save_shares_blob(self):
+        user = User.objects.create(username='user')
+        images = []
+        for i in range(2):
+            image = AttachedImage(content_object=user)
+            image.deduplicate = True
+            image.image.save('photo.GIF', gif_file())
+            images.append(image)
+        name = images[0].image.name
+        self.assertTrue(name.startswith(BLOB_DIR))
+        self.assertTrue(name.endswith(images[0].content_hash + '.gif'))
+        self.assertEqual(images[1].image.name, name)
+        self.assertEqual(ImageBlob.objects.get(name=name).ref_count, 2)
+
+        images[0].delete()
+        self.assertEqual(ImageBlob.objects.get(name=name).ref_count, 1)
+        self.assertEqual(PendingFileDeletion.objects.filter(name=name).count(), 0)
+
+        images[1].delete()
+        self.assertEqual(ImageBlob.objects.filter(name=name).count(), 0)
+        self.assertEqual(PendingFileDeletion.objects.filter(name=name).count(), 1)
+
+
+class BulkAttachTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+
+    def tearDown(self):
+        delete_stored_files()
+
+    def test_one_image_per_file(self):
+        images = AttachedImage.objects.bulk_attach(self.user,
+                                        [gif_file('1.gif'), gif_file('2.gif')],
+                                        main_index=1)
+        self.assertEqual(len(images), 2)
+        self.assertEqual([image.caption for image in images], ['', ''])
+        self.assertEqual(AttachedImage.objects.for_model(self.user).count(), 2)
+        self.assertEqual(AttachedImage.objects.get_main_for(self.user).pk,
+                         images[1].pk)
+
+    def test_captions(self):
+        images = AttachedImage.objects.bulk_attach(self.user,
+                                        [gif_file('1.gif'), gif_file('2.gif')],
+                                        captions=['first', 'second'])
+        self.assertEqual([image.caption for image in images], ['first', 'second'])
+
+    def test_captions_length_mismatch(self):
+        self.assertRaises(ValueError, AttachedImage.objects.bulk_attach,
+                          self.user, [gif_file('1.gif'), gif_file('2.gif')],
+                          captions=['only one'])
+        self.assertEqual(AttachedImage.objects.for_model(self.user).count(), 0)
+
+
+class CheckpointTest(TestCase):
+
+    def setUp(self):
+        fd, self.checkpoint = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.checkpoint)
+
+    def test_failed_ids_are_kept(self):
+        write_checkpoint(self.checkpoint, 120, set([7, 42]))
+        self.assertEqual(read_checkpoint(self.checkpoint), (120, set([7, 42])))
+        write_checkpoint(self.checkpoint, 150, set())
+        self.assertEqual(read_checkpoint(self.checkpoint), (150, set()))
+
+    def test_last_id_only(self):
+        open(self.checkpoint, 'w').write('120')
+        self.assertEqual(read_checkpoint(self.checkpoint), (120, set()))
+
+
+def has_main_image_index():
+    ''' Whether partial unique index from sql/attachedimage.*.sql exists. '''
+    engine = settings.DATABASE_ENGINE
+    if engine == 'sqlite3':
+        try:
+            from sqlite3 import sqlite_version_info
+        except ImportError:
+            from pysqlite2.dbapi2 import sqlite_version_info
+        return sqlite_version_info >= (3, 8, 0)
+    return engine in ('postgresql', 'postgresql_psycopg2')
+
+
+class MainImageTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.images = attach_images(self.user, 3)
+
+    def main_ids(self):
+        return list(AttachedImage.objects.for_model(self.user).
+                              filter(is_main=True).values_list('pk', flat=True))
+
+    def test_set_main(self):
+        for image in self.images:
+            AttachedImage.objects.set_main(image)
+            self.assertTrue(image.is_main)
+            self.assertEqual(self.main_ids(), [image.pk])
+
+    def test_set_main_again(self):
+        main = AttachedImage.objects.get_main_for(self.user)
+        AttachedImage.objects.set_main(main)
+        self.assertEqual(self.main_ids(), [main.pk])
+
+    def test_save_main_image(self):
+        image = AttachedImage(content_object=self.user, image='test/new.gif',
+                              is_main=True)
+        image.save()
+        self.assertEqual(self.main_ids(), [image.pk])
+        # image loaded as main stays the only main image when saved
+        # after set_main was called for another image
+        AttachedImage.objects.set_main(self.images[0])
+        image.save()
+        self.assertEqual(self.main_ids(), [image.pk])
+
+    def test_second_main_row_fails(self):
+        if not has_main_image_index():
+            return
+        other = [image for image in self.images if not image.is_main][0]
+        sid = transaction.savepoint()
+        try:
+            self.assertRaises(IntegrityError,
+                              AttachedImage.objects.filter(pk=other.pk).update,
+                              is_main=True)
+        finally:
+            transaction.savepoint_rollback(sid)
+
+
+class KeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        images = attach_images(self.user, 7)
+        # ties on the ordering key are broken by pk
+        for image, order in zip(images, [5, 5, 5, 3, 3, 1, 1]):
+            AttachedImage.objects.filter(pk=image.pk).update(order=order)
+        self.expected = list(AttachedImage.objects.for_model(self.user).
+                                           order_by('-order', '-pk').
+                                           values_list('pk', flat=True))
+
+    def pks(self, page):
+        return [image.pk for image in page]
+
+    def walk_forward(self, per_page):
+        pages = [AttachedImage.objects.page_for(self.user, per_page=per_page)]
+        while pages[-1].has_next:
+            pages.append(AttachedImage.objects.page_for(self.user,
+                                    pages[-1].next_cursor, per_page))
+        return pages
+
+    def test_forward(self):
+        pages = self.walk_forward(3)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum([self.pks(page) for page in pages], []),
+                         self.expected)
+        self.assertFalse(pages[0].has_previous)
+        self.assertEqual(pages[0].previous_cursor, None)
+        self.assertFalse(pages[-1].has_next)
+        self.assertEqual(pages[-1].next_cursor, None)
+
+    def test_last_page_is_full(self):
+        pages = self.walk_forward(7)
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(self.pks(pages[0]), self.expected)
+        self.assertFalse(pages[0].has_next)
+
+    def test_backward(self):
+        pages = self.walk_forward(3)
+        page = pages[-1]
+        backward = [self.pks(page)]
+        while page.has_previous:
+            page = AttachedImage.objects.page_for(self.user,
+                                                  page.previous_cursor, 3)
+            self.assertTrue(page.has_next)
+            backward.append(self.pks(page))
+        backward.reverse()
+        self.assertEqual(backward, [self.pks(page) for page in pages])
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor('n', 5, 42)
+        self.assertEqual(decode_cursor(cursor), ('n', 5, 42))
+        self.assertEqual(decode_cursor(unicode(cursor)), ('n', 5, 42))
+
+    def test_invalid_cursor(self):
+        cursor = encode_cursor('n', 5, 42)
+        for invalid in ['', 'not a cursor!', cursor[:-2], cursor + '!',
+                        base64.urlsafe_b64encode('x:5:42'),
+                        base64.urlsafe_b64encode('n:5:42; DROP'),
+                        base64.urlsafe_b64encode('n:5'),
+                        u'\u043a\u0443\u0440\u0441\u043e\u0440']:
+            self.assertRaises(InvalidCursor, decode_cursor, invalid)
+            self.assertRaises(InvalidCursor, AttachedImage.objects.page_for,
+                              self.user, invalid)
+
+    def test_invalid_cursor_404(self):
+        request = HttpRequest()
+        request.GET['cursor'] = 'not a cursor!'
+        self.assertRaises(Http404, get_page_or_404, request,
+                          AttachedImage.objects.for_model(self.user), 'order')
+
+
+class AlbumPositionTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        images = attach_images(self.user, 4)
+        # images with equal order are ordered by id
+        AttachedImage.objects.filter(pk=images[1].pk).update(order=images[2].order)
+        self.images = list(AttachedImage.objects.for_model(self.user).
+                                         order_by('-order', '-pk'))
+
+    def expected(self, index):
+        ids = [image.pk for image in self.images]
+        return (index > 0 and ids[index-1] or None,
+                index < len(ids) - 1 and ids[index+1] or None,
+                index + 1, len(ids))
+
+    def test_orm(self):
+        for index, image in enumerate(self.images):
+            self.assertEqual(tuple(image._album_position_orm()),
+                             self.expected(index))
+
+    def test_sql(self):
+        if not supports_window_functions():
+            return
+        for index, image in enumerate(self.images):
+            self.assertEqual(tuple(image._album_position_sql()),
+                             self.expected(index))
+
+    def test_first_and_last(self):
+        first, last = self.images[0], self.images[-1]
+        position = first.get_album_position()
+        self.assertEqual((position.previous, position.position, position.total),
+                         (None, 1, 4))
+        self.assertEqual(position.next.pk, self.images[1].pk)
+        self.assertEqual(first.get_album_position(reversed_ordering=False).position, 4)
+
+        position = last.get_album_position()
+        self.assertEqual((position.next, position.position, position.total),
+                         (None, 4, 4))
+        self.assertEqual(position.previous.pk, self.images[-2].pk)
+        self.assertEqual(last.get_album_position(reversed_ordering=False).position, 1)
+
+
+class CacheInvalidationTest(TestCase):
+
+    def setUp(self):
+        self.timeout = image_cache.CACHE_TIMEOUT
+        image_cache.CACHE_TIMEOUT = 60
+        self.user = User.objects.create(username='user')
+        # entries cached by other tests for an object with the same id
+        # are not read
+        image_cache.invalidate(self.user)
+        self.images = attach_images(self.user, 3)
+        image_cache.invalidate(self.user)
+
+    def tearDown(self):
+        image_cache.CACHE_TIMEOUT = self.timeout
+
+    def cached_ids(self):
+        return [pk for pk, name in AttachedImage.objects.get_cached_images_for(self.user)]
+
+    def cached_main_id(self):
+        return AttachedImage.objects.get_cached_main_for(self.user).pk
+
+    def test_cached(self):
+        ids = self.cached_ids()
+        with assert_max_queries(0):
+            self.assertEqual(self.cached_ids(), ids)
+
+    def test_save(self):
+        self.cached_ids()
+        image = AttachedImage(content_object=self.user, image='test/new.gif')
+        image.save()
+        self.assertEqual(self.cached_ids()[0], image.pk)
+
+        image.is_main = True
+        image.save()
+        self.assertEqual(self.cached_main_id(), image.pk)
+
+    def test_delete(self):
+        self.cached_ids()
+        self.images[0].delete()
+        self.assertEqual(self.cached_ids(),
+                         [image.pk for image in self.images[1:]])
+
+    def test_delete_for(self):
+        self.cached_ids()
+        AttachedImage.objects.delete_for(self.user)
+        self.assertEqual(self.cached_ids(), [])
+        self.assertEqual(AttachedImage.objects.get_cached_main_for(self.user), None)
+
+    def test_reorder(self):
+        ids = self.cached_ids()
+        ids.reverse()
+        AttachedImage.objects.reorder(self.user, ids)
+        self.assertEqual(self.cached_ids(), ids)
+
+    def test_set_main(self):
+        main_id = self.cached_main_id()
+        other = [image for image in self.images if image.pk != main_id][0]
+        AttachedImage.objects.set_main(other)
+        self.assertEqual(self.cached_main_id(), other.pk)
+
+
+class ImageCountTests(object):
+    ''' Count field must follow images attached and deleted one by one
+        and in bulk. '''
+    album_model = None
+
+    def setUp(self):
+        self.album = self.album_model.objects.create()
+
+    def tearDown(self):
+        delete_stored_files()
+
+    def count(self):
+        return self.album_model.objects.get(pk=self.album.pk).image_count
+
+    def attach(self):
+        image = AttachedImage(content_object=self.album, image='test/new.gif')
+        image.save()
+        return image
+
+    def test_attach_and_delete(self):
+        self.assertEqual(self.count(), 0)
+        first = self.attach()
+        second = self.attach()
+        self.assertEqual(self.count(), 2)
+        second.caption = 'changed'
+        second.save()
+        self.assertEqual(self.count(), 2)
+        first.delete()
+        self.assertEqual(self.count(), 1)
+
+    def test_bulk_attach_and_delete(self):
+        self.attach()
+        AttachedImage.objects.bulk_attach(self.album, [gif_file('1.gif'),
+                                                       gif_file('2.gif')])
+        self.assertEqual(self.count(), 3)
+        AttachedImage.objects.delete_for(self.album)
+        self.assertEqual(self.count(), 0)
+
+    def test_delete_for_queryset(self):
+        for i in range(3):
+            self.attach()
+        images = AttachedImage.objects.for_model(self.album)
+        AttachedImage.objects.delete_for(images.filter(pk__in=[images[0].pk]))
+        self.assertEqual(self.count(), 2)
+
+
+if ImageCountField is not None:
+    class ImageCountTest(ImageCountTests, TestCase):
+        album_model = CountedAlbum
+
+    class IncrementalImageCountTest(ImageCountTests, TestCase):
+        album_model = IncrementalAlbum
+
+    class RecalculateAllTest(TestCase):
+
+        def setUp(self):
+            self.albums = [IncrementalAlbum.objects.create() for i in range(3)]
+            for album, count in zip(self.albums, [2, 0, 1]):
+                attach_images(album, count)
+
+        def counts(self):
+            return [IncrementalAlbum.objects.get(pk=album.pk).image_count
+                    for album in self.albums]
+
+        def test_repairs_wrong_counts(self):
+            # attach_images doesn't send signals
+            self.assertEqual(self.counts(), [0, 0, 0])
+            IncrementalAlbum.objects.filter(pk=self.albums[1].pk).\
+                                     update(image_count=42)
+            self.assertEqual(recalculate_all(chunk_size=1), 3)
+            self.assertEqual(self.counts(), [2, 0, 1])
+            self.assertEqual(recalculate_all(), 0)
+
+        def test_since(self):
+            recalculate_all()
+            last_pk = AttachedImage.objects.order_by('-pk')[0].pk
+            attach_images(self.albums[1], 2)
+            IncrementalAlbum.objects.filter(pk=self.albums[2].pk).\
+                                     update(image_count=42)
+            # only albums with new images are recalculated
+            self.assertEqual(recalculate_all(since=last_pk), 1)
+            self.assertEqual(self.counts(), [2, 2, 42])
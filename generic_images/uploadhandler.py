@@ -0,0 +1,77 @@
+'''
+Upload handler for large images. Uploaded data is written to a temporary
+file chunk by chunk (memory usage doesn't depend on file size) while image
+header, size and content hash are collected, so the file doesn't have to
+be read again for validation (see
+:class:`~generic_images.forms.ImageUploadField`) and for filling image
+metadata. With ``FileSystemStorage`` the temporary file is moved to its
+destination instead of being copied.
+
+Invalid images and images with too many pixels (see
+:mod:`generic_images.image_info`) are detected as soon as the header is
+received; the rest of such files is not stored.
+
+Enable it for all requests::
+
+    FILE_UPLOAD_HANDLERS = (
+        'generic_images.uploadhandler.StreamingImageUploadHandler',
+    )
+
+or for one view (before ``request.POST`` or ``request.FILES`` is
+accessed)::
+
+    from generic_images.uploadhandler import streaming_image_uploads
+
+    @streaming_image_uploads
+    def upload(request):
+        ...
+'''
+from django.core.files.uploadhandler import TemporaryFileUploadHandler, \
+                                            StopFutureHandlers
+from django.utils.functional import wraps
+
+from generic_images.image_info import ImageInfoReader, get_image_error
+
+
+class StreamingImageUploadHandler(TemporaryFileUploadHandler):
+    ''' Writes uploads to temporary files and sets ``image_info`` (dict
+        returned by :func:`~generic_images.image_info.read_image_info`) and
+        ``image_error`` (see :func:`~generic_images.image_info.get_image_error`)
+        attributes of uploaded files.
+        Files not declared as images by the client are stored as usual.
+    '''
+
+    def new_file(self, field_name, file_name, content_type, *args, **kwargs):
+        super(StreamingImageUploadHandler, self).new_file(field_name,
+                                        file_name, content_type, *args, **kwargs)
+        self.reader = ImageInfoReader()
+        self.is_image = (content_type or '').startswith('image/')
+        self.error = None
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error is not None:
+            return None
+        self.reader.feed(raw_data)
+        if self.is_image and self.reader.header_parsed:
+            self.error = get_image_error(self.reader.get_info())
+            if self.error is not None: # don't store the rest
+                return None
+        return super(StreamingImageUploadHandler, self).receive_data_chunk(
+                                                                raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super(StreamingImageUploadHandler, self).file_complete(file_size)
+        uploaded.image_info = self.reader.get_info()
+        uploaded.image_error = self.error or get_image_error(uploaded.image_info)
+        return uploaded
+
+
+def streaming_image_uploads(view):
+    ''' View decorator that makes
+        :class:`~generic_images.uploadhandler.StreamingImageUploadHandler`
+        handle uploads of the request. '''
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers.insert(0, StreamingImageUploadHandler(request))
+        return view(request, *args, **kwargs)
+    return wraps(view)(wrapper)
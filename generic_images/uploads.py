@@ -0,0 +1,157 @@
+'''
+Resumable chunked uploads of attached images.
+
+Each file is uploaded as a separate
+:class:`~generic_images.models.UploadSession`: client starts the session,
+sends chunks (in any order, in parallel, possibly several times) and then
+completes several sessions at once. Completed files are assembled from the
+chunks, validated by header (see :mod:`generic_images.image_info`) and
+attached using
+:meth:`~generic_images.managers.AttachedImageManager.bulk_attach`, so
+denormalised counts and caches are updated once for the whole batch.
+Interrupted uploads are resumed by asking which chunks were received
+(:func:`get_status`).
+
+HTTP interface is provided by :mod:`generic_images.views`; include
+``generic_images.urls`` in your urlconf to enable the admin uploader::
+
+    urlpatterns += patterns('',
+        url(r'^generic_images/', include('generic_images.urls')),
+    )
+
+``GENERIC_IMAGES_UPLOAD_CHUNK_SIZE`` setting is the chunk size in bytes
+(default is 1Mb), ``GENERIC_IMAGES_MAX_UPLOAD_SIZE`` is the maximum file
+size (default is 50Mb). Sessions that were not completed are removed by
+``cleanup_image_files`` management command.
+'''
+import uuid
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+
+from generic_images.models import AttachedImage, UploadSession, UploadChunk
+from generic_images.image_info import ImageInfoReader, get_image_error
+from generic_utils.contenttypes import resolver
+
+CHUNK_SIZE = getattr(settings, 'GENERIC_IMAGES_UPLOAD_CHUNK_SIZE', 1024*1024)
+MAX_UPLOAD_SIZE = getattr(settings, 'GENERIC_IMAGES_MAX_UPLOAD_SIZE',
+                          50*1024*1024)
+
+
+class UploadError(Exception):
+    ''' Invalid upload request. '''
+
+
+def start_upload(obj, file_name, size, user=None):
+    ''' Starts upload of file ``file_name`` (``size`` bytes) that will be
+        attached to ``obj``. Returns
+        :class:`~generic_images.models.UploadSession` instance. '''
+    if size <= 0 or size > MAX_UPLOAD_SIZE:
+        raise UploadError("File size must be between 1 and %d bytes." %
+                          MAX_UPLOAD_SIZE)
+    return UploadSession.objects.create(key=uuid.uuid4().hex,
+                                        content_type=resolver.get_for_model(obj),
+                                        object_id=obj.pk, user=user,
+                                        file_name=file_name[:255], size=size,
+                                        chunk_size=CHUNK_SIZE)
+
+
+def store_chunk(session, index, data):
+    ''' Stores chunk number ``index`` (``data`` string) of upload
+        ``session``. Chunk that was already received is replaced. '''
+    if not 0 <= index < session.chunk_count:
+        raise UploadError("Invalid chunk index.")
+    if len(data) != session.get_chunk_size(index):
+        raise UploadError("Chunk size must be %d bytes." %
+                          session.get_chunk_size(index))
+
+    storage = session.get_storage()
+    name = session.get_chunk_name(index)
+    if storage.exists(name):
+        storage.delete(name)
+    saved = storage.save(name, ContentFile(data))
+    if saved != name: # the same chunk was sent concurrently
+        storage.delete(saved)
+    UploadChunk.objects.get_or_create(session=session, index=index)
+
+
+def get_status(session):
+    ''' Returns dict with upload progress: ``size``, ``chunk_size``,
+        ``chunks`` (number of chunks), ``received`` (list of received
+        chunk indexes), ``received_size`` (bytes) and ``complete`` (True if
+        all chunks were received). '''
+    received = sorted(session.chunks.values_list('index', flat=True))
+    return {
+        'key': session.key,
+        'size': session.size,
+        'chunk_size': session.chunk_size,
+        'chunks': session.chunk_count,
+        'received': received,
+        'received_size': sum([session.get_chunk_size(i) for i in received]),
+        'complete': len(received) == session.chunk_count,
+    }
+
+
+def assemble(session):
+    ''' Returns uploaded file (``TemporaryUploadedFile``) assembled from
+        chunks of ``session``. It has ``image_info`` and ``image_error``
+        attributes like files handled by
+        :class:`~generic_images.uploadhandler.StreamingImageUploadHandler`.
+    '''
+    if session.chunks.count() != session.chunk_count:
+        raise UploadError("Not all chunks were received.")
+
+    storage = session.get_storage()
+    uploaded = TemporaryUploadedFile(session.file_name, None, session.size,
+                                     None)
+    reader = ImageInfoReader()
+    for index in range(session.chunk_count):
+        chunk = storage.open(session.get_chunk_name(index))
+        try:
+            for data in chunk.chunks():
+                reader.feed(data)
+                uploaded.write(data)
+        finally:
+            chunk.close()
+    uploaded.seek(0)
+    uploaded.image_info = reader.get_info()
+    uploaded.image_error = get_image_error(uploaded.image_info)
+    return uploaded
+
+
+def complete_uploads(obj, sessions, user=None):
+    ''' Attaches files of upload ``sessions`` to ``obj`` in one batch.
+        Returns (list of created images, dict with error codes for
+        sessions that failed keyed by session key) tuple. Sessions of
+        attached files and of files that are not valid images are
+        discarded; incomplete sessions (and all sessions if attaching
+        fails) are kept so uploads can be resumed.
+    '''
+    files, errors, done = [], {}, []
+    try:
+        for session in sessions:
+            try:
+                uploaded = assemble(session)
+            except UploadError:
+                errors[session.key] = 'incomplete'
+                continue
+            if uploaded.image_error is not None:
+                errors[session.key] = uploaded.image_error
+                uploaded.close()
+                done.append(session)
+                continue
+            uploaded.session_key = session.key
+            uploaded.session = session
+            files.append(uploaded)
+
+        images = AttachedImage.objects.bulk_attach(obj, files, user=user)
+        for image, uploaded in zip(images, files):
+            image.session_key = uploaded.session_key
+        done.extend([uploaded.session for uploaded in files])
+    finally:
+        for uploaded in files:
+            uploaded.close()
+        for session in done:
+            session.discard()
+    return images, errors
@@ -0,0 +1,14 @@
+from django.conf.urls.defaults import *
+
+urlpatterns = patterns('generic_images.views',
+    url(r'^upload/(?P<app_label>\w+)/(?P<model_name>\w+)/(?P<object_id>\d+)/$',
+        'upload_start', name='generic_images-upload-start'),
+    url(r'^upload/(?P<app_label>\w+)/(?P<model_name>\w+)/(?P<object_id>\d+)/complete/$',
+        'upload_complete', name='generic_images-upload-complete'),
+    url(r'^reorder/(?P<app_label>\w+)/(?P<model_name>\w+)/(?P<object_id>\d+)/$',
+        'images_reorder', name='generic_images-reorder'),
+    url(r'^upload/(?P<key>[0-9a-f]{32})/$',
+        'upload_status', name='generic_images-upload-status'),
+    url(r'^upload/(?P<key>[0-9a-f]{32})/(?P<index>\d+)/$',
+        'upload_chunk', name='generic_images-upload-chunk'),
+)
@@ -0,0 +1,145 @@
+'''
+JSON views for resumable chunked uploads (see :mod:`generic_images.uploads`)
+and reordering of attached images. They are used by the admin uploader of
+:data:`~generic_images.admin.AttachedImagesInline`.
+
+User must be logged in and must have permissions to add attached images
+and to change the object images are attached to.
+'''
+import sys
+
+from django.db.models import get_model
+from django.http import HttpResponse, HttpResponseForbidden, \
+                        HttpResponseNotAllowed, Http404
+from django.shortcuts import get_object_or_404
+from django.core.urlresolvers import reverse
+from django.utils import simplejson
+from django.utils.functional import wraps
+
+from generic_images import uploads
+from generic_images.models import AttachedImage, UploadSession
+from generic_utils.contenttypes import resolver
+
+
+def _json(data, status=200):
+    response = HttpResponse(simplejson.dumps(data), mimetype='application/json')
+    response.status_code = status
+    return response
+
+
+def _call(view, request, *args, **kwargs):
+    try:
+        return view(request, *args, **kwargs)
+    except uploads.UploadError:
+        return _json({'error': unicode(sys.exc_info()[1])}, 400)
+
+
+def _can_upload(request, app_label, model_name):
+    user = request.user
+    return user.is_authenticated() and \
+           user.has_perm('generic_images.add_attachedimage') and \
+           user.has_perm('%s.change_%s' % (app_label, model_name))
+
+
+def _object_view(methods):
+    ''' Passes the object images are attached to instead of url
+        parameters and checks permissions. '''
+    def decorator(view):
+        def wrapper(request, app_label, model_name, object_id):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            model = get_model(app_label, model_name)
+            if model is None:
+                raise Http404
+            if not _can_upload(request, app_label, model_name):
+                return HttpResponseForbidden()
+            obj = get_object_or_404(model, pk=object_id)
+            return _call(view, request, obj)
+        return wraps(view)(wrapper)
+    return decorator
+
+
+def _session_view(methods):
+    ''' Passes upload session instead of ``key`` url parameter and checks
+        that it belongs to the user. '''
+    def decorator(view):
+        def wrapper(request, key, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            if not request.user.is_authenticated():
+                return HttpResponseForbidden()
+            session = get_object_or_404(UploadSession, key=key,
+                                        user=request.user.pk)
+            content_type = resolver.get_for_id(session.content_type_id)
+            if not _can_upload(request, content_type.app_label,
+                               content_type.model):
+                return HttpResponseForbidden()
+            return _call(view, request, session, **kwargs)
+        return wraps(view)(wrapper)
+    return decorator
+
+
+@_object_view(['POST'])
+def upload_start(request, obj):
+    ''' Starts upload session for file with ``name`` and ``size`` POST
+        parameters. Returns upload status (see
+        :func:`~generic_images.uploads.get_status`) with ``url`` of the
+        session. Chunks are sent to ``<url><chunk index>/``. '''
+    try:
+        size = int(request.POST.get('size', 0))
+    except ValueError:
+        size = 0
+    session = uploads.start_upload(obj, request.POST.get('name', ''), size,
+                                   request.user)
+    return _json(_status(session))
+
+
+@_session_view(['GET'])
+def upload_status(request, session):
+    ''' Returns upload status; is used for resuming interrupted uploads. '''
+    return _json(_status(session))
+
+
+@_session_view(['PUT', 'POST'])
+def upload_chunk(request, session, index):
+    ''' Stores chunk (request body). '''
+    if int(request.META.get('CONTENT_LENGTH') or 0) > session.chunk_size:
+        raise uploads.UploadError("Chunk is too large.")
+    uploads.store_chunk(session, int(index), request.raw_post_data)
+    return _json({'received': int(index)})
+
+
+@_object_view(['POST'])
+def upload_complete(request, obj):
+    ''' Attaches files of upload sessions (``key`` POST parameters) to the
+        object. Returns created images and error codes of failed uploads
+        (keyed by session key). '''
+    content_type_id = resolver.get_id_for_model(obj)
+    sessions = UploadSession.objects.filter(key__in=request.POST.getlist('key'),
+                                            content_type=content_type_id,
+                                            object_id=obj.pk,
+                                            user=request.user.pk)
+    images, errors = uploads.complete_uploads(obj, list(sessions), request.user)
+    return _json({
+        'images': [{'key': image.session_key, 'id': image.pk,
+                    'url': image.image.url} for image in images],
+        'errors': errors,
+    })
+
+
+@_object_view(['POST'])
+def images_reorder(request, obj):
+    ''' Changes order of images attached to the object (see
+        :meth:`~generic_images.managers.AttachedImageManager.reorder`).
+        ``id`` POST parameters are image ids in the new order. '''
+    try:
+        updated = AttachedImage.objects.reorder(obj, request.POST.getlist('id'))
+    except ValueError:
+        return _json({'error': unicode(sys.exc_info()[1])}, 400)
+    return _json({'updated': updated})
+
+
+def _status(session):
+    status = uploads.get_status(session)
+    status['url'] = reverse('generic_images-upload-status', args=[session.key])
+    return status
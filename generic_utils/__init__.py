@@ -1,4 +1,4 @@
-from django.contrib.contenttypes.models import ContentType
+from generic_utils.contenttypes import resolver
 
 def get_template_search_list(app_name, object, template_name):
     """ Returns template search list.
@@ -10,7 +10,7 @@ def get_template_search_list(app_name, object, template_name):
     [u'my_app/auth/user/list.html', u'my_app/auth/list.html', 'my_app/list.html']
 
     """
-    ctype = ContentType.objects.get_for_model(object)
+    ctype = resolver.get_for_model(object)
     return [
         u"%s/%s/%s/%s" % (app_name, ctype.app_label, ctype.model, template_name),
         u"%s/%s/%s" % (app_name, ctype.app_label, template_name,),
@@ -0,0 +1,109 @@
+'''
+Per-process content type cache.
+
+``ContentType.objects.get_for_model`` caches content types by model but
+getting content type by id through a ForeignKey (``obj.content_type``)
+always hits the database. :data:`resolver` maps models, model instances and
+content type ids to each other without queries once content types are
+loaded. It can be warmed at startup (e.g. in :file:`urls.py`)::
+
+    from generic_utils.contenttypes import resolver
+    resolver.warm()
+
+Cache is cleared after ``syncdb`` (and South migrations) because content
+types can be created or deleted there.
+'''
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import signals
+
+
+class ContentTypeResolver(object):
+    ''' Bounded cache of ContentType instances.
+
+        .. attribute:: hits
+
+            Number of lookups served from cache.
+
+        .. attribute:: misses
+
+            Number of lookups that were passed to ``ContentType.objects``
+            (and could hit the database).
+    '''
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.clear()
+
+    def clear(self):
+        ''' Clears the cache and resets counters. '''
+        self._by_model = {}
+        self._by_id = {}
+        self.hits = 0
+        self.misses = 0
+
+    def warm(self):
+        ''' Loads all content types using one query. '''
+        for content_type in ContentType.objects.all():
+            self._add(content_type)
+
+    def get_for_model(self, model):
+        ''' Returns ContentType for model class or instance. '''
+        opts = model._meta
+        while getattr(opts, 'proxy', False):
+            opts = opts.proxy_for_model._meta
+        key = (opts.app_label, opts.object_name.lower())
+        try:
+            content_type = self._by_model[key]
+            self.hits += 1
+            return content_type
+        except KeyError:
+            self.misses += 1
+        content_type = ContentType.objects.get_for_model(model)
+        self._add(content_type)
+        return content_type
+
+    def get_id_for_model(self, model):
+        ''' Returns ContentType id for model class or instance. '''
+        return self.get_for_model(model).pk
+
+    def get_for_id(self, content_type_id):
+        ''' Returns ContentType with given id. '''
+        try:
+            content_type = self._by_id[content_type_id]
+            self.hits += 1
+            return content_type
+        except KeyError:
+            self.misses += 1
+        content_type = ContentType.objects.get_for_id(content_type_id)
+        self._add(content_type)
+        return content_type
+
+    def get_model(self, content_type_id):
+        ''' Returns model class for ContentType id. '''
+        return self.get_for_id(content_type_id).model_class()
+
+    def _add(self, content_type):
+        if len(self._by_id) >= self.max_size:
+            old = self._by_id.popitem()[1]
+            self._by_model.pop((old.app_label, old.model), None)
+        self._by_id[content_type.pk] = content_type
+        self._by_model[(content_type.app_label, content_type.model)] = content_type
+
+
+resolver = ContentTypeResolver()
+''' Default :class:`ContentTypeResolver` instance. '''
+
+
+def _invalidate(sender, **kwargs):
+    resolver.clear()
+    ContentType.objects.clear_cache()
+
+signals.post_syncdb.connect(_invalidate)
+
+try:
+    from south.signals import post_migrate
+except ImportError:
+    pass
+else:
+    post_migrate.connect(_invalidate)
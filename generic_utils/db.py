@@ -0,0 +1,160 @@
+''' Low-level database helpers for operations Django ORM can't express
+    efficiently. '''
+
+import sys
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.backends.util import truncate_name
+from django.utils.functional import wraps
+
+
+def mark_dirty():
+    ''' Marks the transaction dirty after raw SQL writes so
+        ``commit_on_success`` commits them (Django only does this for ORM
+        writes). Writes are committed at once if transactions are not
+        managed. '''
+    if transaction.is_managed():
+        transaction.set_dirty()
+    else:
+        transaction.commit_unless_managed()
+
+
+def commit_on_success_unless_managed(func):
+    ''' Like ``transaction.commit_on_success`` but ``func`` joins the
+        caller's transaction if it is already managed (nested
+        ``commit_on_success`` would commit the caller's transaction in
+        the middle). '''
+    managed_func = transaction.commit_on_success(func)
+    def wrapper(*args, **kwargs):
+        if transaction.is_managed():
+            return func(*args, **kwargs)
+        return managed_func(*args, **kwargs)
+    return wraps(func)(wrapper)
+
+
+def supports_window_functions():
+    ''' Returns True if database supports window functions
+        (``ROW_NUMBER() OVER (...)`` etc.): PostgreSQL >= 8.4 and
+        SQLite >= 3.25.
+    '''
+    engine = settings.DATABASE_ENGINE
+    if engine in ('postgresql', 'postgresql_psycopg2'):
+        version = getattr(connection.ops, 'postgres_version', None)
+        return version is None or tuple(version[:2]) >= (8, 4)
+    if engine == 'sqlite3':
+        try:
+            from sqlite3 import sqlite_version_info
+        except ImportError:
+            from pysqlite2.dbapi2 import sqlite_version_info
+        return sqlite_version_info >= (3, 25, 0)
+    return False
+
+
+def bulk_insert(model, objects, batch_size=100):
+    ''' Inserts ``objects`` (unsaved instances of ``model``) using one
+        ``executemany`` call per ``batch_size`` objects.
+        Model ``save`` method is not called and no signals are sent.
+        Primary keys are not set on inserted objects.
+        Transaction is marked dirty (see :func:`mark_dirty`).
+    '''
+    opts = model._meta
+    fields = [f for f in opts.local_fields if not isinstance(f, models.AutoField)]
+    qn = connection.ops.quote_name
+    sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+                qn(opts.db_table),
+                ", ".join([qn(f.column) for f in fields]),
+                ", ".join(["%s"] * len(fields)))
+
+    objects = list(objects)
+    cursor = connection.cursor()
+    for start in range(0, len(objects), batch_size):
+        rows = [[f.get_db_prep_save(f.pre_save(obj, True)) for f in fields]
+                for obj in objects[start:start+batch_size]]
+        cursor.executemany(sql, rows)
+    mark_dirty()
+
+
+def bulk_update(model, field_name, values, batch_size=500):
+    ''' Sets ``field_name`` field of ``model`` rows to different values
+        using one ``UPDATE ... SET field = CASE pk WHEN ... END`` query per
+        ``batch_size`` rows. ``values`` is a dict with primary keys as keys
+        and new field values as values.
+        Model ``save`` method is not called and no signals are sent.
+        Transaction is marked dirty (see :func:`mark_dirty`).
+    '''
+    opts = model._meta
+    field = opts.get_field(field_name)
+    qn = connection.ops.quote_name
+    items = list(values.items())
+    cursor = connection.cursor()
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start+batch_size]
+        params = []
+        for pk, value in batch:
+            params.extend([pk, field.get_db_prep_save(value)])
+        params.extend([pk for pk, value in batch])
+        cursor.execute("UPDATE %s SET %s = CASE %s %s END WHERE %s IN (%s)" % (
+                            qn(opts.db_table), qn(field.column), qn(opts.pk.column),
+                            " ".join(["WHEN %s THEN %s"] * len(batch)),
+                            qn(opts.pk.column), ", ".join(["%s"] * len(batch))),
+                       params)
+    mark_dirty()
+
+
+def bulk_delete(model, pk_list, batch_size=500):
+    ''' Deletes ``model`` rows with primary keys from ``pk_list`` using
+        one ``DELETE ... WHERE pk IN (...)`` query per ``batch_size`` rows.
+        Related objects are not deleted and no signals are sent.
+        Transaction is marked dirty (see :func:`mark_dirty`).
+    '''
+    opts = model._meta
+    qn = connection.ops.quote_name
+    pk_list = list(pk_list)
+    cursor = connection.cursor()
+    for start in range(0, len(pk_list), batch_size):
+        batch = pk_list[start:start+batch_size]
+        cursor.execute("DELETE FROM %s WHERE %s IN (%s)" % (
+                            qn(opts.db_table), qn(opts.pk.column),
+                            ", ".join(["%s"] * len(batch))),
+                       batch)
+    mark_dirty()
+
+
+def composite_index_sql(model):
+    ''' Returns CREATE INDEX statements for multi-column indexes declared
+        by ``composite_indexes`` attribute of ``model`` (list of field name
+        tuples)::
+
+            class MyModel(models.Model):
+                ...
+                composite_indexes = [('content_type', 'object_id')]
+
+        Indexes are created by ``syncdb`` for new tables.
+    '''
+    opts = model._meta
+    qn = connection.ops.quote_name
+    statements = []
+    for field_names in getattr(model, 'composite_indexes', ()):
+        columns = [opts.get_field(name).column for name in field_names]
+        name = truncate_name("%s_%s" % (opts.db_table, "_".join(columns)),
+                             connection.ops.max_name_length())
+        statements.append("CREATE INDEX %s ON %s (%s)" % (qn(name),
+                          qn(opts.db_table), ", ".join([qn(c) for c in columns])))
+    return statements
+
+
+def create_composite_indexes(sender, created_models, verbosity=1, **kwargs):
+    ''' ``post_syncdb`` handler that creates composite indexes for models
+        of app ``sender`` that were just created. '''
+    app_models = models.get_models(sender)
+    cursor = connection.cursor()
+    for model in created_models:
+        if model not in app_models or getattr(model._meta, 'proxy', False):
+            continue
+        for sql in composite_index_sql(model):
+            if verbosity >= 2:
+                sys.stdout.write("Creating composite index for %s model\n" %
+                                 model._meta.object_name)
+            cursor.execute(sql)
+    transaction.commit_unless_managed()
@@ -0,0 +1,258 @@
+'''
+Opt-in instrumentation of generic_images and generic_utils hot paths.
+
+Instrumented operations (image ``save``/``delete``, ``next``/``previous``,
+injectors, image count fields, bulk manager methods, renditions) report
+number of SQL queries, number of storage calls and wall time to hooks.
+Nothing is measured until a hook is added, so there is no overhead by
+default::
+
+    from generic_utils import instrumentation
+
+    instrumentation.add_hook(instrumentation.registry)
+    instrumentation.add_hook(instrumentation.logging_hook())
+    instrumentation.add_hook(instrumentation.statsd_hook(statsd_client))
+
+    ...
+    print instrumentation.registry.operations
+
+Hooks are callables taking operation name and dict with ``queries``,
+``storage_calls`` and ``time`` (seconds) keys. Hooks can also be listed in
+``GENERIC_IMAGES_INSTRUMENTATION_HOOKS`` setting (dotted paths to hook
+callables).
+
+Counts of nested operations are inclusive: queries of ``ImageCountField``
+update are also counted for ``AttachedImage.save`` that triggered it.
+QuerySet methods like ``select_with_main_images`` are lazy, their queries
+are reported by injectors when the QuerySet is evaluated.
+
+Use :func:`measure` to measure arbitrary code and
+:class:`~generic_utils.test_helpers.assert_max_queries` in tests.
+'''
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils.functional import wraps
+
+_local = threading.local()
+_hooks = []
+_installed = False
+
+STORAGE_METHODS = ('open', 'save', 'delete', 'exists', 'size', 'url',
+                   'listdir', 'path')
+
+
+class Measurement(object):
+    ''' Counts queries and storage calls made by current thread and
+        measures wall time while it is active (use it with ``with``
+        statement).
+
+        .. attribute:: queries, storage_calls, time
+
+        .. attribute:: sql
+
+            List of executed SQL statements if ``record_sql`` is True.
+    '''
+
+    def __init__(self, name, record_sql=False):
+        self.name = name
+        self.queries = 0
+        self.storage_calls = 0
+        self.time = 0.0
+        self.sql = [] if record_sql else None
+
+    def __enter__(self):
+        install()
+        self._start = time.time()
+        _active().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.time = time.time() - self._start
+        _active().remove(self)
+        return False
+
+    def as_dict(self):
+        return {'queries': self.queries, 'storage_calls': self.storage_calls,
+                'time': self.time}
+
+
+class _Operation(Measurement):
+    def __exit__(self, *args):
+        super(_Operation, self).__exit__(*args)
+        for hook in list(_hooks):
+            hook(self.name, self.as_dict())
+        return False
+
+
+def measure(name):
+    ''' Returns context manager that measures enclosed code and reports it
+        to hooks as operation ``name``. '''
+    return _Operation(name)
+
+
+def instrumented(name):
+    ''' Decorator that reports function calls to hooks as operation
+        ``name``. Function is called directly if there are no hooks. '''
+    def decorator(fn):
+        def wrapper(*args, **kwargs):
+            if not _hooks:
+                return fn(*args, **kwargs)
+            operation = _Operation(name)
+            operation.__enter__()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                operation.__exit__(None, None, None)
+        return wraps(fn)(wrapper)
+    return decorator
+
+
+def add_hook(hook):
+    ''' Adds hook; instrumentation is enabled by the first hook. '''
+    install()
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def logging_hook(logger=None, level=logging.DEBUG):
+    ''' Returns hook that logs operations (to ``generic_images`` logger by
+        default). '''
+    logger = logger or logging.getLogger('generic_images')
+    def hook(name, stats):
+        logger.log(level, "%s: %d queries, %d storage calls, %.1fms", name,
+                   stats['queries'], stats['storage_calls'],
+                   stats['time'] * 1000)
+    return hook
+
+
+def statsd_hook(client, prefix='generic_images'):
+    ''' Returns hook that sends operation stats to statsd ``client``
+        (object with ``incr(name, count)`` and ``timing(name, ms)``
+        methods). '''
+    def hook(name, stats):
+        key = "%s.%s" % (prefix, name)
+        client.incr(key + '.calls', 1)
+        client.incr(key + '.queries', stats['queries'])
+        client.incr(key + '.storage_calls', stats['storage_calls'])
+        client.timing(key + '.time', stats['time'] * 1000)
+    return hook
+
+
+class Registry(object):
+    ''' Hook that aggregates operation stats in memory.
+
+        .. attribute:: operations
+
+            dict with operation names as keys and dicts with ``calls``,
+            ``queries``, ``storage_calls`` and ``time`` totals as values.
+    '''
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.operations = {}
+
+    def __call__(self, name, stats):
+        totals = self.operations.setdefault(name, {'calls': 0, 'queries': 0,
+                                                   'storage_calls': 0,
+                                                   'time': 0.0})
+        totals['calls'] += 1
+        for key, value in stats.items():
+            totals[key] += value
+
+
+registry = Registry()
+''' Default :class:`Registry` instance. '''
+
+
+def install():
+    ''' Wraps database cursors and default storage so queries and storage
+        calls can be counted. It is called automatically. '''
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    get_cursor = connection.cursor
+    def cursor(*args, **kwargs):
+        return _CountingCursor(get_cursor(*args, **kwargs))
+    connection.cursor = cursor
+
+    from django.core.files.storage import default_storage
+    instrument_storage(default_storage)
+
+
+def instrument_storage(storage):
+    ''' Makes calls of ``storage`` methods counted. Default storage is
+        instrumented automatically; call this for other storages. '''
+    for method_name in STORAGE_METHODS:
+        method = getattr(storage, method_name, None)
+        if method is not None:
+            setattr(storage, method_name, _counting_storage_method(method))
+
+
+def _active():
+    try:
+        return _local.active
+    except AttributeError:
+        _local.active = []
+        return _local.active
+
+
+def _counting_storage_method(method):
+    def wrapper(*args, **kwargs):
+        for measurement in _active():
+            measurement.storage_calls += 1
+        return method(*args, **kwargs)
+    return wraps(method)(wrapper)
+
+
+class _CountingCursor(object):
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def _count(self, sql):
+        for measurement in _active():
+            measurement.queries += 1
+            if measurement.sql is not None:
+                measurement.sql.append(sql)
+
+    def execute(self, sql, params=()):
+        self._count(sql)
+        return self.cursor.execute(sql, params)
+
+    def executemany(self, sql, param_list):
+        self._count(sql)
+        return self.cursor.executemany(sql, param_list)
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+
+class _LazyHook(object):
+    ''' Hook from settings; it is imported on first call because hook
+        modules can import instrumented modules. '''
+    def __init__(self, path):
+        self.path = path
+        self.hook = None
+
+    def __call__(self, name, stats):
+        if self.hook is None:
+            from django.utils.importlib import import_module
+            module_name, attr = self.path.rsplit('.', 1)
+            self.hook = getattr(import_module(module_name), attr)
+        self.hook(name, stats)
+
+for path in getattr(settings, 'GENERIC_IMAGES_INSTRUMENTATION_HOOKS', ()):
+    add_hook(_LazyHook(path))
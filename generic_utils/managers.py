@@ -1,6 +1,12 @@
 
-from django.db import models
-from django.contrib.contenttypes.models import ContentType
+from django.db import models, connection
+from django.db.models import Count
+from django.db.models.fields import FieldDoesNotExist
+from django.db.models.query import QuerySet
+
+from generic_utils.db import supports_window_functions
+from generic_utils.contenttypes import resolver
+from generic_utils.instrumentation import instrumented
 
 
 def _pop_data_from_kwargs(kwargs):
@@ -9,6 +15,62 @@ def _pop_data_from_kwargs(kwargs):
     return ct_field, fk_field
 
 
+class InjectingQuerySet(QuerySet):
+    """ QuerySet that injects related objects (using ``inject_to`` method of
+        :class:`~generic_utils.managers.RelatedInjector` or
+        :class:`~generic_utils.managers.GenericInjector`) when it is
+        evaluated. Injections are chainable like other QuerySet methods::
+
+            qs = InjectingQuerySet(User).filter(is_active=True).\\
+                    inject(AttachedImage.injector, 'avatar', is_main=True)
+
+            for user in qs[:10]: # 2 or 3 queries are executed here
+                print user.avatar
+
+    """
+    _injections = ()
+
+    def inject(self, injector, field_name, get_inject_object = lambda obj: obj,
+               **kwargs):
+        ''' Returns new QuerySet that will call
+            ``injector.inject_to(objects, field_name, get_inject_object, **kwargs)``
+            for its results.
+        '''
+        return self._add_injection('inject_to', injector, field_name,
+                                   get_inject_object, kwargs)
+
+    def inject_list(self, injector, field_name,
+                    get_inject_object = lambda obj: obj, **kwargs):
+        ''' Same as :meth:`inject` but uses ``injector.inject_list_to``. '''
+        return self._add_injection('inject_list_to', injector, field_name,
+                                   get_inject_object, kwargs)
+
+    def inject_count(self, injector, field_name,
+                     get_inject_object = lambda obj: obj, **kwargs):
+        ''' Same as :meth:`inject` but uses ``injector.inject_count_to``. '''
+        return self._add_injection('inject_count_to', injector, field_name,
+                                   get_inject_object, kwargs)
+
+    def _add_injection(self, method, injector, field_name, get_inject_object,
+                       kwargs):
+        injection = (method, injector, field_name, get_inject_object, kwargs)
+        return self._clone(_injections=self._injections + (injection,))
+
+    def iterator(self):
+        objects = super(InjectingQuerySet, self).iterator()
+        if not self._injections:
+            return objects
+        objects = list(objects)
+        for method, injector, field_name, get_inject_object, kwargs in self._injections:
+            getattr(injector, method)(objects, field_name, get_inject_object,
+                                      **kwargs)
+        return iter(objects)
+
+    def _clone(self, klass=None, setup=False, **kwargs):
+        kwargs.setdefault('_injections', self._injections)
+        return super(InjectingQuerySet, self)._clone(klass, setup, **kwargs)
+
+
 class RelatedInjector(models.Manager):
     """ Manager that can emulate ``select_related`` fetching
         reverse relations using 1 additional SQL query.
@@ -17,6 +79,11 @@ class RelatedInjector(models.Manager):
         self.fk_field = fk_field
         super(RelatedInjector, self).__init__(*args, **kwargs)
 
+    chunk_size = 500
+    ''' Maximum number of objects related objects are selected for
+    by one query (``fk__in`` list size). '''
+
+    @instrumented('RelatedInjector.inject_to')
     def inject_to(self, objects, field_name, get_inject_object = lambda obj: obj,
                   select_related = None, **kwargs):
         '''
@@ -35,6 +102,9 @@ class RelatedInjector(models.Manager):
 
         All other kwargs will be passed as arguments to queryset filter function.
 
+        Related objects are selected by one query per
+        :attr:`chunk_size` objects.
+
         For example, we need to prefetch user profiles when we display a list of
         comments::
 
@@ -68,26 +138,150 @@ class RelatedInjector(models.Manager):
 
         '''
 
-        #get related data
-        kwargs.update({self.fk_field+'__in': [ get_inject_object(obj).pk for obj in objects ]})
+        data_dict = {}
+        for data in self._related_chunks(objects, get_inject_object, kwargs):
+            if select_related:
+                data = data.select_related(select_related)
+            for item in data.iterator():
+                data_dict[self._get_fk_value(item)] = item
+
+        # add info to original data
+        for obj in objects:
+            injected_obj = get_inject_object(obj)
+            if injected_obj.pk in data_dict:
+                setattr(injected_obj, field_name, data_dict[injected_obj.pk])
 
-        data = self.get_query_set().filter(**kwargs)
-        if select_related:
-            data = data.select_related(select_related)
+    def inject_iter(self, objects, field_name,
+                    get_inject_object = lambda obj: obj, **kwargs):
+        '''
+        Streaming version of :meth:`inject_to`: takes any iterable
+        (e.g. ``queryset.iterator()``), injects related objects into
+        :attr:`chunk_size` objects at a time and yields objects as they are
+        processed, so memory usage doesn't depend on the number of objects.
+        Arguments are the same as for :meth:`inject_to`::
 
-        data_dict = dict((getattr(item, self.fk_field), item) for item in list(data))
+            users = User.objects.all().iterator()
+            for user in AttachedImage.injector.inject_iter(users, 'avatar',
+                                                           is_main=True):
+                export(user, user.avatar)
+
+        '''
+        chunk = []
+        for obj in objects:
+            chunk.append(obj)
+            if len(chunk) >= self.chunk_size:
+                self.inject_to(chunk, field_name, get_inject_object, **kwargs)
+                for item in chunk:
+                    yield item
+                chunk = []
+        if chunk:
+            self.inject_to(chunk, field_name, get_inject_object, **kwargs)
+            for item in chunk:
+                yield item
+
+    def _related_chunks(self, objects, get_inject_object, kwargs):
+        ''' Yields querysets of objects related to ``objects``,
+            one per :attr:`chunk_size` objects. '''
+        pks = [get_inject_object(obj).pk for obj in objects]
+        for start in range(0, len(pks), self.chunk_size):
+            chunk_kwargs = dict(kwargs)
+            chunk_kwargs[self.fk_field+'__in'] = pks[start:start+self.chunk_size]
+            yield self.get_query_set().filter(**chunk_kwargs)
+
+    def _get_fk_value(self, item):
+        # plain pk even if fk_field is a ForeignKey
+        return getattr(item, self.model._meta.get_field(self.fk_field).attname)
+
+    @instrumented('RelatedInjector.inject_list_to')
+    def inject_list_to(self, objects, field_name,
+                       get_inject_object = lambda obj: obj, limit = None,
+                       order_by = None, select_related = None, **kwargs):
+        '''
+        Same as :meth:`inject_to` but all related objects are selected and
+        injected as a list (empty list if there are no related objects).
+        Lists are ordered by ``order_by`` (list of field names) or by
+        default model ordering.
+
+        If ``limit`` is given then at most ``limit`` related objects are
+        selected for each object. Database does the limiting using
+        ``ROW_NUMBER()`` window function if it is supported and ordering
+        consists of plain field names; otherwise extra rows are discarded
+        in python.
+
+        Example: 4 images for each object in list::
+
+            AttachedImage.injector.inject_list_to(objects, 'images', limit=4)
+
+        '''
+        lists = {}
+        for data in self._related_chunks(objects, get_inject_object, kwargs):
+            if order_by:
+                data = data.order_by(*order_by)
+            if select_related:
+                data = data.select_related(select_related)
+            if limit and supports_window_functions():
+                limited = self._limit_per_object(data, limit)
+                if limited is not None:
+                    data = limited
+
+            for item in data.iterator():
+                items = lists.setdefault(self._get_fk_value(item), [])
+                if not limit or len(items) < limit:
+                    items.append(item)
 
-        # add info to original data
         for obj in objects:
             injected_obj = get_inject_object(obj)
+            setattr(injected_obj, field_name, lists.get(injected_obj.pk, []))
 
-            if data_dict.has_key(injected_obj):
-                # fk_field was ForeignKey so there are objects in lookup dict
-                get_inject_object(obj).__setattr__(field_name, data_dict[injected_obj])
+    @instrumented('RelatedInjector.inject_count_to')
+    def inject_count_to(self, objects, field_name,
+                        get_inject_object = lambda obj: obj, **kwargs):
+        '''
+        Injects number of related objects as ``field_name`` attribute using
+        one GROUP BY query. Other arguments are the same as for
+        :meth:`inject_to`.
+        '''
+        counts = {}
+        for data in self._related_chunks(objects, get_inject_object, kwargs):
+            data = data.order_by().values(self.fk_field).annotate(count=Count('pk'))
+            counts.update((row[self.fk_field], row['count']) for row in data)
 
-            elif data_dict.has_key(injected_obj.pk):
-                # fk_field was simple IntegerField so there are pk's in lookup dict
-                get_inject_object(obj).__setattr__(field_name, data_dict[injected_obj.pk])
+        for obj in objects:
+            injected_obj = get_inject_object(obj)
+            setattr(injected_obj, field_name, counts.get(injected_obj.pk, 0))
+
+    def _limit_per_object(self, data, limit):
+        ''' Returns ``data`` QuerySet restricted to first ``limit`` rows
+            for each ``fk_field`` value or None if ordering can't be
+            expressed in SQL here.
+        '''
+        opts = self.model._meta
+        qn = connection.ops.quote_name
+
+        ordering = []
+        for name in (data.query.order_by or opts.ordering):
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            try:
+                field = name == 'pk' and opts.pk or opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            ordering.append("%s %s" % (qn(field.column),
+                                       descending and 'DESC' or 'ASC'))
+        ordering.append(qn(opts.pk.column))
+
+        candidates, params = data.values('pk').order_by().query.as_sql()
+        where = """%(table)s.%(pk)s IN (
+            SELECT ranked_pk FROM (
+                SELECT %(pk)s AS ranked_pk, ROW_NUMBER() OVER (
+                    PARTITION BY %(fk)s ORDER BY %(ordering)s
+                ) AS rn
+                FROM %(table)s WHERE %(pk)s IN (%(candidates)s)
+            ) ranked WHERE rn <= %%s
+        )""" % dict(table=qn(opts.db_table), pk=qn(opts.pk.column),
+                    fk=qn(opts.get_field(self.fk_field).column),
+                    ordering=", ".join(ordering), candidates=candidates)
+        return data.extra(where=[where], params=list(params) + [limit])
 
 
 class GenericInjector(RelatedInjector):
@@ -127,6 +321,7 @@ class GenericInjector(RelatedInjector):
         super(GenericInjector, self).__init__(fk_field, *args, **kwargs)
 
 
+    @instrumented('GenericInjector.inject_to')
     def inject_to(self, objects, field_name, get_inject_object = lambda obj: obj, **kwargs):
         '''
         ``objects`` is an iterable. Images (or other generic-related model instances)
@@ -141,6 +336,9 @@ class GenericInjector(RelatedInjector):
 
         All other kwargs will be passed as arguments to queryset filter function.
 
+        Objects can be instances of different models: they are grouped by
+        content type and one query is executed per content type.
+
         Example: you have a list of comments. Each comment has 'user' attribute.
         You want to fetch 10 comments and their authors with avatars. Avatars should
         be accessible as `user.avatar`::
@@ -150,13 +348,40 @@ class GenericInjector(RelatedInjector):
 
         '''
 
-        try:
-            content_type = ContentType.objects.get_for_model(get_inject_object(objects[0]))
-        except IndexError:
-            return objects
+        return self._inject_grouped(super(GenericInjector, self).inject_to,
+                                    objects, field_name, get_inject_object, kwargs)
+
+    @instrumented('GenericInjector.inject_list_to')
+    def inject_list_to(self, objects, field_name,
+                       get_inject_object = lambda obj: obj, **kwargs):
+        ''' Same as :meth:`RelatedInjector.inject_list_to` but for generic
+            relations. '''
+        return self._inject_grouped(super(GenericInjector, self).inject_list_to,
+                                    objects, field_name, get_inject_object, kwargs)
+
+    @instrumented('GenericInjector.inject_count_to')
+    def inject_count_to(self, objects, field_name,
+                        get_inject_object = lambda obj: obj, **kwargs):
+        ''' Same as :meth:`RelatedInjector.inject_count_to` but for generic
+            relations. '''
+        return self._inject_grouped(super(GenericInjector, self).inject_count_to,
+                                    objects, field_name, get_inject_object, kwargs)
+
+    def _inject_grouped(self, inject, objects, field_name, get_inject_object,
+                        kwargs):
+        # Evaluate querysets only once. Objects can be of different models
+        # so they are grouped by content type, one query per group.
+        objects = list(objects)
+        groups = {}
+        for obj in objects:
+            content_type_id = resolver.get_id_for_model(get_inject_object(obj))
+            groups.setdefault(content_type_id, []).append(obj)
 
-        kwargs.update({self.ct_field: content_type})
-        return super(GenericInjector, self).inject_to(objects, field_name, get_inject_object, **kwargs)
+        for content_type_id, group in groups.items():
+            group_kwargs = dict(kwargs)
+            group_kwargs[self.ct_field] = content_type_id
+            inject(group, field_name, get_inject_object, **group_kwargs)
+        return objects
 
 
 class GenericModelManager(models.Manager):
@@ -167,10 +392,17 @@ class GenericModelManager(models.Manager):
         super(GenericModelManager, self).__init__(*args, **kwargs)
 
     def for_model(self, model, content_type=None):
-        ''' Returns all objects that are attached to given model '''
-        content_type = content_type or ContentType.objects.get_for_model(model)
+        ''' Returns all objects that are attached to given model.
+            Objects are filtered by content type id so ContentType instance
+            is not needed; it is taken from
+            :data:`~generic_utils.contenttypes.resolver` if not passed.
+        '''
+        if content_type is None:
+            content_type_id = resolver.get_id_for_model(model)
+        else:
+            content_type_id = content_type.pk
         kwargs = {
-                    self.ct_field: content_type,
+                    self.ct_field: content_type_id,
                     self.fk_field: model.pk
                  }
         objects = self.get_query_set().filter(**kwargs)
@@ -4,7 +4,10 @@ from django.db import models
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.generic import GenericForeignKey
 
+from django.db.models import signals
+
 from generic_utils.managers import GenericModelManager, GenericInjector
+from generic_utils.db import create_composite_indexes
 
 class GenericModelBase(models.Model):
     '''
@@ -45,6 +48,13 @@ class GenericModelBase(models.Model):
         :class:`~generic_utils.managers.GenericInjector` manager.
     '''
 
+    composite_indexes = [('content_type', 'object_id')]
+    '''
+        Multi-column indexes created by ``syncdb`` (see
+        :func:`~generic_utils.db.composite_index_sql`). Lookups of objects
+        attached to given object(s) use this index.
+    '''
+
     class Meta:
         abstract=True
         
@@ -62,4 +72,7 @@ class TrueGenericModelBase(models.Model):
     injector = GenericInjector()
 
     class Meta:
-        abstract=True
\ No newline at end of file
+        abstract=True
+
+
+signals.post_syncdb.connect(create_composite_indexes)
@@ -0,0 +1,143 @@
+'''
+Keyset (cursor) pagination. Pages are selected by seeking on
+``(field, pk)`` instead of using OFFSET so deep pages cost the same as
+the first one (given an index on the seek columns). Cursors are opaque
+url-safe strings.
+
+Objects are ordered by ``-field, -pk``::
+
+    from generic_utils.pagination import keyset_page
+
+    page = keyset_page(queryset, 'order', request.GET.get('cursor'))
+    for obj in page:
+        ...
+    if page.has_next:
+        next_url = '?cursor=%s' % page.next_cursor
+
+See :func:`get_page_or_404` for use in views.
+'''
+import base64
+
+from django.db.models import Q
+from django.http import Http404
+
+
+class InvalidCursor(ValueError):
+    ''' Cursor can't be decoded. '''
+
+
+def encode_cursor(direction, value, pk):
+    return base64.urlsafe_b64encode("%s:%d:%d" % (direction, value, pk)).rstrip('=')
+
+
+def decode_cursor(cursor):
+    ''' Returns (direction, value, pk) tuple for cursor string.
+        Direction is ``'n'`` for the next page and ``'p'`` for the previous
+        page. Raises :class:`InvalidCursor` for invalid cursors. '''
+    try:
+        cursor = str(cursor)
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, value, pk = data.split(':')
+        if direction not in ('n', 'p'):
+            raise ValueError
+        value, pk = int(value), int(pk)
+        # base64 decoder skips unexpected characters, so tampered
+        # cursors are only detected by comparing with the encoded values
+        if encode_cursor(direction, value, pk) != cursor:
+            raise ValueError
+        return direction, value, pk
+    except (TypeError, ValueError, UnicodeError):
+        raise InvalidCursor(cursor)
+
+
+class KeysetPage(object):
+    ''' Page of objects returned by :func:`keyset_page`.
+
+        .. attribute:: object_list
+
+            List of objects on the page.
+
+        .. attribute:: has_next, has_previous
+
+            Whether there are objects after (before) this page.
+
+        .. attribute:: next_cursor, previous_cursor
+
+            Cursors of the next and previous pages (None if there is no
+            such page).
+    '''
+
+    def __init__(self, object_list, field, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = self.previous_cursor = None
+        if object_list and has_next:
+            last = object_list[-1]
+            self.next_cursor = encode_cursor('n', getattr(last, field), last.pk)
+        if object_list and has_previous:
+            first = object_list[0]
+            self.previous_cursor = encode_cursor('p', getattr(first, field),
+                                                 first.pk)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_page(queryset, field, cursor=None, per_page=20):
+    ''' Returns :class:`KeysetPage` with at most ``per_page`` objects from
+        ``queryset`` ordered by ``-field, -pk`` (``field`` must be an
+        integer field) starting after ``cursor`` (first page if cursor is
+        None). Only one query is executed.
+        Raises :class:`InvalidCursor` for invalid cursors.
+    '''
+    if cursor is None:
+        objects = list(queryset.order_by('-'+field, '-pk')[:per_page+1])
+        return KeysetPage(objects[:per_page], field,
+                          len(objects) > per_page, False)
+
+    direction, value, pk = decode_cursor(cursor)
+    if direction == 'n':
+        seek = queryset.filter(Q(**{field+'__lt': value}) |
+                               Q(**{field: value, 'pk__lt': pk}))
+        objects = list(seek.order_by('-'+field, '-pk')[:per_page+1])
+        return KeysetPage(objects[:per_page], field,
+                          len(objects) > per_page, True)
+
+    seek = queryset.filter(Q(**{field+'__gt': value}) |
+                           Q(**{field: value, 'pk__gt': pk}))
+    objects = list(seek.order_by(field, 'pk')[:per_page+1])
+    has_previous = len(objects) > per_page
+    objects = objects[:per_page]
+    objects.reverse()
+    return KeysetPage(objects, field, True, has_previous)
+
+
+def get_page_or_404(request, queryset, field, per_page=20,
+                    cursor_param='cursor'):
+    ''' View helper: returns :func:`keyset_page` for cursor from
+        ``cursor_param`` GET parameter. Raises Http404 for invalid cursors.
+        Example for a :class:`~generic_utils.app_utils.PluggableSite` view::
+
+            @site_method(template_name='albums/show_album.html')
+            def show_album(request, album_site, object, context, template_name):
+                page = get_page_or_404(request,
+                                       AttachedImage.objects.for_model(object),
+                                       'order')
+                context.update({'page': page})
+                return render_to_response(template_name, context_instance=context)
+
+        and in template::
+
+            {% for image in page %} ... {% endfor %}
+            {% if page.has_previous %}<a href="?cursor={{ page.previous_cursor }}">&larr;</a>{% endif %}
+            {% if page.has_next %}<a href="?cursor={{ page.next_cursor }}">&rarr;</a>{% endif %}
+    '''
+    try:
+        return keyset_page(queryset, field,
+                           request.GET.get(cursor_param) or None, per_page)
+    except InvalidCursor:
+        raise Http404("Invalid cursor.")
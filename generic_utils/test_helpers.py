@@ -32,3 +32,40 @@ class ViewTest(TestCase):
 
         self.assertRedirects(response, getattr(settings, 'LOGIN_URL', '/accounts/login/'))
         return response
+
+
+class assert_max_queries(object):
+    '''
+    Context manager that fails if enclosed code executes more than ``num``
+    SQL queries (and more than ``storage_calls`` storage calls if given)::
+
+        with assert_max_queries(2):
+            image = AttachedImage.objects.get_main_for(album)
+
+    Executed SQL is listed in the failure message. Queries are counted by
+    :mod:`generic_utils.instrumentation` so ``DEBUG`` doesn't have to be
+    enabled.
+    '''
+
+    def __init__(self, num, storage_calls=None):
+        from generic_utils.instrumentation import Measurement
+        self.num = num
+        self.storage_calls = storage_calls
+        self.measurement = Measurement('query budget', record_sql=True)
+
+    def __enter__(self):
+        return self.measurement.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.measurement.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        measurement = self.measurement
+        if measurement.queries > self.num:
+            raise AssertionError("%d queries executed, %d expected at most:\n%s" % (
+                        measurement.queries, self.num, "\n".join(measurement.sql)))
+        if self.storage_calls is not None and \
+                measurement.storage_calls > self.storage_calls:
+            raise AssertionError("%d storage calls, %d expected at most" % (
+                        measurement.storage_calls, self.storage_calls))
+        return False
@@ -13,20 +13,21 @@ setup(
       long_description = "This app provides image model (with useful managers, "
                          "methods and fields) that can be attached to any "
                          "other Django model using generic relations. "
-                         "It also provides admin multi-image uploader with "
-                         "client-side image resizing, animated progress bar "
-                         "and before-upload image previews.\n\n"
+                         "It also provides resumable chunked admin "
+                         "multi-image uploader with progress bar.\n\n"
 
                          "Documentation is here: http://django-generic-images.googlecode.com/hg/docs/_build/html/index.html",
 
       license = 'MIT license',
-      packages=['generic_images', 'generic_utils'],
+      packages=['generic_images', 'generic_images.management',
+                'generic_images.management.commands', 'generic_utils'],
       package_data={'generic_images': [
                                         'locale/en/LC_MESSAGES/*',
                                         'locale/ru/LC_MESSAGES/*',
                                         'locale/pl/LC_MESSAGES/*',
                                         'templates/generic_images/*',
-                                        'media/generic_images/js/*'
+                                        'media/generic_images/js/*',
+                                        'sql/*'
                                       ]},
 
       requires = ['django (>=1.1)'],